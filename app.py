@@ -10,11 +10,11 @@ from plotly.subplots import make_subplots
 import plotly.express as px
 from datetime import datetime, timedelta
 import json
+import time
 import numpy as np
 
 # Importa módulos locais
 from modules.database import AgroDatabase
-from modules.technical_analysis import TechnicalAnalysisEngine
 from modules.fundamental_analysis import FundamentalAnalysisEngine
 from modules.news_analysis import NewsAnalysisEngine
 from modules.monitoring_system import AgroMonitoringSystem
@@ -216,16 +216,32 @@ def create_candlestick_chart(ticker, df, indicators):
     )
     
     # Médias Móveis
-    if indicators and 'SMA_20' in indicators:
-        fig.add_trace(
-            go.Scatter(
-                x=df.index,
-                y=indicators['SMA_20'],
-                name='SMA 20',
-                line=dict(color='#ffa726', width=2)
-            ),
-            row=1, col=1
-        )
+    sma_colors = {'SMA_20': '#ffa726', 'SMA_50': '#42a5f5', 'SMA_200': '#8d6e63'}
+    for name, color in sma_colors.items():
+        if indicators and name in indicators:
+            fig.add_trace(
+                go.Scatter(
+                    x=df.index,
+                    y=indicators[name],
+                    name=name.replace('_', ' '),
+                    line=dict(color=color, width=2)
+                ),
+                row=1, col=1
+            )
+    
+    # Bandas de Bollinger
+    if indicators and 'BB_upper' in indicators:
+        for name in ['BB_upper', 'BB_lower']:
+            fig.add_trace(
+                go.Scatter(
+                    x=df.index,
+                    y=indicators[name],
+                    name='Bollinger' if name == 'BB_upper' else None,
+                    showlegend=(name == 'BB_upper'),
+                    line=dict(color='rgba(120,120,120,0.5)', width=1, dash='dot')
+                ),
+                row=1, col=1
+            )
     
     # Volume
     colors = ['#ef5350' if row['Close'] < row['Open'] else '#26a69a' 
@@ -270,6 +286,27 @@ def create_candlestick_chart(ticker, df, indicators):
             row=4, col=1
         )
     
+    if indicators and 'MACD_signal' in indicators:
+        fig.add_trace(
+            go.Scatter(
+                x=df.index,
+                y=indicators['MACD_signal'],
+                name='Sinal',
+                line=dict(color='#ef5350', width=1.5)
+            ),
+            row=4, col=1
+        )
+        fig.add_trace(
+            go.Bar(
+                x=df.index,
+                y=indicators['MACD_hist'],
+                name='Histograma',
+                marker_color=['#26a69a' if v >= 0 else '#ef5350' for v in indicators['MACD_hist'].fillna(0)],
+                showlegend=False
+            ),
+            row=4, col=1
+        )
+    
     # Layout
     fig.update_layout(
         height=1000,
@@ -450,6 +487,24 @@ with st.sidebar:
     st.markdown("📱 **62 99975-5774**")
     st.markdown("[💬 WhatsApp](https://wa.me/5562999755774)")
     
+    brapi = init_system().brapi
+    if brapi is not None:
+        st.caption(f"📡 Cota Brapi hoje: {brapi.remaining_quota()} requisições restantes")
+    if init_system().news.news_api_key:
+        st.caption(f"📰 Cota NewsAPI hoje: {init_system().quota.remaining('newsapi')} requisições restantes")
+    
+    with st.expander("📡 Provedores de Dados"):
+        provider_health = pd.DataFrame(init_system().provider_metrics()).T
+        st.dataframe(
+            provider_health[['circuit', 'requests', 'failures', 'avg_latency_ms', 'quota_remaining']],
+            use_container_width=True
+        )
+        http_stats = init_system().http_stats()
+        st.caption(
+            f"HTTP: {http_stats['requests']} requisições, "
+            f"{http_stats['not_modified']} sem alteração (304)"
+        )
+    
     st.markdown("---")
     st.markdown("### ℹ️ Sobre")
     st.caption("Versão 2.0 Premium")
@@ -607,6 +662,33 @@ with tab1:
     else:
         st.info("👆 Clique em 'Executar Análise Completa' para começar")
 
+    # Monitoramento intradiário (buffers e indicadores persistem entre atualizações)
+    with st.expander("⏱️ Monitoramento Intraday (1 e 5 minutos)"):
+        intraday = init_system().get_intraday_monitor()
+
+        if st.button("🔄 Atualizar Intraday"):
+            with st.spinner("Consultando candles de 1 minuto..."):
+                intraday.poll()
+
+        panel = intraday.snapshot()
+        if not panel.empty:
+            panel['ticker'] = panel['ticker'].str.replace('.SA', '', regex=False)
+            st.dataframe(panel.round(2), use_container_width=True, hide_index=True)
+
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                intraday_ticker = st.selectbox("Ativo", intraday.tickers, key='intraday_ticker')
+                intraday_minutes = st.radio("Intervalo", intraday.intervals, format_func=lambda m: f"{m} min", key='intraday_minutes')
+            with col2:
+                bars = intraday.frame(intraday_ticker, intraday_minutes)
+                if not bars.empty:
+                    st.line_chart(bars['Close'], height=250)
+
+            if intraday.last_poll:
+                st.caption(f"🕐 Última consulta: {datetime.fromtimestamp(intraday.last_poll).strftime('%H:%M:%S')}")
+        else:
+            st.info("Sem candles intradiários ainda. Clique em 'Atualizar Intraday' durante o pregão.")
+
 # TAB 2: ANÁLISE INDIVIDUAL PREMIUM
 with tab2:
     st.markdown("### 🔍 Análise Detalhada de Ativo")
@@ -632,7 +714,11 @@ with tab2:
     with col2:
         analyze_btn = st.button("📊 Analisar", type="primary", use_container_width=True)
     
+    # Mantém o ativo analisado entre reruns (ex.: ao carregar dados completos)
     if analyze_btn:
+        st.session_state['analysis_ticker'] = ticker_options[selected_option]
+    
+    if st.session_state.get('analysis_ticker') == ticker_options[selected_option]:
         ticker_real = ticker_options[selected_option]
         
         with st.spinner(f"🔍 Analisando {selected_option.split(' - ')[0]}..."):
@@ -676,11 +762,11 @@ with tab2:
                     st.markdown("---")
                     st.markdown("### 📈 Análise Gráfica")
                     
-                    tech_engine = TechnicalAnalysisEngine()
-                    df = tech_engine.get_price_data(ticker_real, period='6mo')
+                    # Reaproveita os preços/indicadores publicados por analyze_asset
+                    chart_data = system.technical.get_chart_data(ticker_real, period=system.analysis_period)
                     
-                    if df is not None and len(df) >= 50:
-                        indicators = tech_engine.calculate_indicators(df)
+                    if chart_data is not None:
+                        df, indicators = chart_data
                         
                         fig = create_candlestick_chart(
                             analysis['ticker_display'],
@@ -701,7 +787,24 @@ with tab2:
                         
                         with col1:
                             st.markdown("**Tendência**")
-                            st.info(analysis['technical']['trend']['trend'])
+                            trend_info = analysis['technical']['trend']
+                            if trend_info.get('adx') is not None and pd.notna(trend_info['adx']):
+                                st.info(f"{trend_info['trend']} • {trend_info['strength']} (ADX: {trend_info['adx']:.1f})")
+                            else:
+                                st.info(trend_info['trend'])
+                            
+                            multi_tf = analysis['technical'].get('multi_timeframe')
+                            if multi_tf:
+                                st.markdown("**Multi-Timeframe**")
+                                st.info(
+                                    f"Semanal: {multi_tf['1wk']['trend']} • Mensal: {multi_tf['1mo']['trend']}"
+                                    + (f" • {multi_tf['confirmation']}" if 'confirmation' in multi_tf else "")
+                                )
+                            
+                            patterns = analysis['technical'].get('patterns')
+                            if patterns and patterns.get('labels'):
+                                st.markdown("**Padrões de Candle**")
+                                st.info(f"{', '.join(patterns['labels'])} • Viés: {patterns['signal']}")
                             
                             st.markdown("**Momentum**")
                             st.info(f"{analysis['technical']['momentum']['status']} (RSI: {analysis['technical']['momentum'].get('rsi', 0):.1f})")
@@ -710,11 +813,24 @@ with tab2:
                             st.markdown("**MACD**")
                             st.info(analysis['technical']['macd']['signal'])
                             
+                            if analysis['technical'].get('volatility'):
+                                vol = analysis['technical']['volatility']
+                                st.markdown("**Volatilidade**")
+                                st.info(f"ATR: R$ {vol['atr']:.2f} ({vol['atr_pct']:.1f}%) • Posição nas Bandas de Bollinger: {vol['bb_position']:.0f}%")
+                            
                             if analysis['technical']['support_resistance']:
                                 sr = analysis['technical']['support_resistance']
                                 st.markdown("**Suporte/Resistência**")
                                 st.success(f"Resistência: R$ {sr['resistance']:.2f} (+{sr['dist_resistance_pct']:.1f}%)")
                                 st.error(f"Suporte: R$ {sr['support']:.2f} (-{sr['dist_support_pct']:.1f}%)")
+                                
+                                levels = sr.get('levels')
+                                if levels and (levels['supports'] or levels['resistances']):
+                                    st.markdown("**Níveis por Pivôs**")
+                                    for level in levels['resistances']:
+                                        st.caption(f"🔺 R$ {level['price']:.2f} (+{level['distance_pct']:.1f}%) • {level['touches']} toques • {level['strength']}")
+                                    for level in levels['supports']:
+                                        st.caption(f"🔻 R$ {level['price']:.2f} (-{level['distance_pct']:.1f}%) • {level['touches']} toques • {level['strength']}")
                     
                     with tab_fund:
                         col1, col2 = st.columns(2)
@@ -736,10 +852,19 @@ with tab2:
                             if analysis['fundamental']['health']:
                                 st.markdown("**Saúde Financeira**")
                                 st.info(analysis['fundamental']['health']['health'])
+                        
+                        # Payload completo só é baixado sob demanda
+                        if st.checkbox("📄 Carregar dados fundamentalistas completos", key=f"full_info_{ticker_real}"):
+                            with st.spinner("Carregando dados completos..."):
+                                full_info = system.fundamental.get_full_fundamental_data(ticker_real)
+                            if full_info:
+                                st.json(full_info, expanded=False)
+                            else:
+                                st.warning("Dados completos indisponíveis para este ativo")
                     
                     with tab_news:
                         sentiment = analysis['news']['sentiment']
-                        st.markdown(f"**Sentimento:** {sentiment['sentiment']}")
+                        st.markdown(f"**Sentimento:** {sentiment['sentiment']} ({sentiment['score']:+.1f})")
                         
                         col1, col2, col3 = st.columns(3)
                         with col1:
@@ -748,6 +873,63 @@ with tab2:
                             st.metric("🔴 Negativo", sentiment['negative'])
                         with col3:
                             st.metric("⚪ Neutro", sentiment['neutral'])
+                        
+                        catalysts = analysis['news']['catalysts']
+                        if catalysts:
+                            st.markdown("**Catalisadores:**")
+                            by_label = {}
+                            for catalyst in catalysts:
+                                by_label.setdefault(catalyst['label'], set()).add(catalyst['term'].lower())
+                            for label, terms in by_label.items():
+                                st.markdown(f"- **{label}**: {', '.join(sorted(terms))}")
+                        
+                        recent_news = analysis['news']['recent_news']
+                        if recent_news:
+                            st.markdown("**Últimas notícias:**")
+                            for item in recent_news[:5]:
+                                st.markdown(
+                                    f"- [{item['title']}]({item['url']}) — "
+                                    f"{item['source'] or item['provider']}, {item['published_at'][:10]}"
+                                )
+                        else:
+                            st.caption("Nenhuma notícia recente coletada para este ativo")
+                        
+                        # Busca no índice local das notícias já coletadas
+                        st.markdown("---")
+                        st.markdown("**🔎 Buscar nas notícias coletadas**")
+                        sector = analysis['info']['sector']
+                        col1, col2, col3 = st.columns([3, 2, 1])
+                        with col1:
+                            news_query = st.text_input(
+                                "Palavras ou \"frase exata\"",
+                                placeholder='ex.: geada  ou  "recuperação judicial"',
+                                key='news_query'
+                            )
+                        with col2:
+                            news_scope = st.radio(
+                                "Escopo",
+                                ["Este ativo", f"Setor ({sector})", "Todos"],
+                                horizontal=True,
+                                key='news_scope'
+                            )
+                        with col3:
+                            news_days = st.number_input("Dias", min_value=1, max_value=365, value=30, key='news_days')
+                        
+                        search_started = time.perf_counter()
+                        found = system.news.search_news(
+                            news_query,
+                            tickers=[ticker_real] if news_scope == "Este ativo" else None,
+                            sectors=[sector] if news_scope.startswith("Setor") else None,
+                            days=news_days
+                        )
+                        search_ms = (time.perf_counter() - search_started) * 1000
+                        st.caption(f"{len(found)} notícias • {search_ms:.1f} ms")
+                        for item in found:
+                            st.markdown(
+                                f"- [{item['title']}]({item['url']}) — "
+                                f"{item['source'] or item['provider']}, {item['published_at'][:10]} "
+                                f"· {', '.join(t.replace('.SA', '') for t in item['tickers'])}"
+                            )
                 else:
                     st.error("❌ Não foi possível analisar este ativo")
             except Exception as e:
@@ -772,7 +954,8 @@ with tab3:
                 'Fundamental': round(r['fundamental']['score']['score'], 1),
                 'Preço (R$)': round(r['price_data']['current'], 2),
                 'Var 1M (%)': round(r['price_data']['change_1m'], 2),
-                'Recomendação': r['recommendation']['action']
+                'Recomendação': r['recommendation']['action'],
+                'Padrões': ', '.join(r['technical'].get('patterns', {}).get('labels', []))
             })
         
         df = pd.DataFrame(df_data)
@@ -781,7 +964,7 @@ with tab3:
         # Filtros
         st.markdown("#### 🔍 Filtros")
         
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             sector_filter = st.multiselect(
@@ -805,9 +988,28 @@ with tab3:
                 default=[]
             )
         
+        with col4:
+            support_filter = st.checkbox("Perto de suporte (≤ 3%)", value=False)
+        
+        pattern_options = sorted({
+            label for r in results
+            for label in r['technical'].get('patterns', {}).get('labels', [])
+        })
+        pattern_filter = st.multiselect(
+            "Filtrar por Padrão de Candle (último pregão)",
+            options=pattern_options,
+            default=[]
+        )
+        
         # Aplica filtros
         df_filtered = df.copy()
         
+        if support_filter:
+            # Consulta ao índice de níveis montado na varredura, sem recálculo
+            near = init_system().near_support(3.0)
+            near_display = [r['ticker_display'] for r in results if r['ticker'] in near]
+            df_filtered = df_filtered[df_filtered['Ticker'].isin(near_display)]
+        
         if sector_filter:
             df_filtered = df_filtered[df_filtered['Setor'].isin(sector_filter)]
         
@@ -819,6 +1021,11 @@ with tab3:
         if action_filter:
             df_filtered = df_filtered[df_filtered['Recomendação'].isin(action_filter)]
         
+        if pattern_filter:
+            df_filtered = df_filtered[
+                df_filtered['Padrões'].apply(lambda p: any(label in p.split(', ') for label in pattern_filter))
+            ]
+        
         # Exibe tabela estilizada
         st.markdown(f"**{len(df_filtered)} ativos encontrados**")
         
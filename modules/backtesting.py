@@ -0,0 +1,243 @@
+"""
+Backtest Vetorizado da Estratégia de Recomendação
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class BacktestEngine:
+    """
+    Reaplica o score técnico e a regra de recomendação sobre o histórico
+    armazenado e simula a estratégia do plano de trade (stop, alvo e prazo).
+
+    Cada candle com score >= `entry_threshold` é um sinal de entrada no
+    fechamento. As saídas de todos os sinais são resolvidas de uma vez com
+    janelas deslizantes sobre máximas/mínimas: o que vier primeiro entre
+    stop e alvo, ou o fechamento ao fim do prazo. Se stop e alvo forem
+    atingidos no mesmo candle, considera-se o stop.
+
+    Enquanto há posição aberta no ticker, novos sinais dele são ignorados.
+    O capital é dividido igualmente entre os tickers do grupo, cada parte
+    reinvestida só nas operações do seu ticker; o drawdown é medido na
+    curva dessa carteira, nas datas de saída.
+    """
+
+    def __init__(self, technical, database, stop_pct=0.03, target_pct=0.15,
+                 horizon=5, entry_threshold=55, period='max'):
+        self.technical = technical
+        self.database = database
+        self.stop_pct = stop_pct
+        self.target_pct = target_pct
+        self.horizon = horizon
+        self.entry_threshold = entry_threshold
+        self.period = period
+
+    def load_history(self, tickers=None, offline=False):
+        """
+        Histórico do armazenamento local (baixa apenas o que faltar);
+        com `offline=True` usa só o que já está em disco
+        """
+        tickers = list(tickers) if tickers is not None else self.database.get_all_tickers()
+        if offline and self.technical.store is not None:
+            frames = {ticker: self.technical.store.load(ticker) for ticker in tickers}
+            return {ticker: df for ticker, df in frames.items() if not df.empty}
+        return self.technical.get_price_data_batch(tickers, period=self.period)
+
+    def simulate_exits(self, df):
+        """
+        Resultado de uma entrada em cada candle (NaN onde não há prazo suficiente)
+        Retorna (retornos, desfecho, candles até a saída) com desfecho
+        1 = alvo, -1 = stop, 0 = prazo
+        """
+        close = df['Close'].to_numpy(dtype=float)
+        high = df['High'].to_numpy(dtype=float)
+        low = df['Low'].to_numpy(dtype=float)
+        n, h = len(close), self.horizon
+
+        returns = np.full(n, np.nan)
+        outcome = np.zeros(n, dtype=int)
+        held = np.full(n, h, dtype=int)
+        if n <= h:
+            return returns, outcome, held
+
+        # Janela t -> candles t+1 .. t+h
+        entry = close[:n - h, None]
+        highs = sliding_window_view(high[1:], h)[:n - h]
+        lows = sliding_window_view(low[1:], h)[:n - h]
+
+        target_hit = highs >= entry * (1 + self.target_pct)
+        stop_hit = lows <= entry * (1 - self.stop_pct)
+        first_target = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1), h)
+        first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), h)
+
+        stopped = (first_stop < h) & (first_stop <= first_target)
+        targeted = (first_target < h) & ~stopped
+        expiry_return = close[h:] / close[:n - h] - 1
+
+        returns[:n - h] = np.select(
+            [stopped, targeted], [-self.stop_pct, self.target_pct], default=expiry_return
+        )
+        outcome[:n - h] = np.select([stopped, targeted], [-1, 1], default=0)
+        held[:n - h] = np.select([stopped, targeted], [first_stop + 1, first_target + 1], default=h)
+        return returns, outcome, held
+
+    def run(self, tickers=None, frames=None):
+        """Executa o backtest e retorna {'trades', 'by_ticker', 'by_sector'}"""
+        frames = frames if frames is not None else self.load_history(tickers)
+        indicators = self.technical.calculate_indicators_batch(frames)
+
+        trades = []
+        for ticker, ticker_indicators in indicators.items():
+            df = frames[ticker]
+            scores = self.technical.score_series(df, ticker_indicators)['score'].to_numpy()
+            returns, outcome, held = self.simulate_exits(df)
+            candidates = np.flatnonzero((scores >= self.entry_threshold) & ~np.isnan(returns))
+            signals = candidates[non_overlapping(candidates, held[candidates])]
+            if not len(signals):
+                continue
+
+            info = self.database.get_ticker_info(ticker) or {}
+            trades.append(pd.DataFrame({
+                'ticker': ticker,
+                'ticker_display': info.get('ticker_display', ticker),
+                'sector': info.get('sector', 'N/A'),
+                'date': df.index[signals],
+                'exit_date': df.index[signals + held[signals]],
+                'score': scores[signals],
+                'return': returns[signals],
+                'outcome': outcome[signals],
+            }))
+
+        columns = ['ticker', 'ticker_display', 'sector', 'date', 'exit_date', 'score', 'return', 'outcome']
+        trades = pd.concat(trades, ignore_index=True) if trades else pd.DataFrame(columns=columns)
+        trades = trades.sort_values('date', kind='stable').reset_index(drop=True)
+
+        # Tickers com histórico também ocupam a sua parte do capital, mesmo sem operar
+        sectors = pd.Series({
+            ticker: (self.database.get_ticker_info(ticker) or {}).get('sector', 'N/A')
+            for ticker in indicators
+        }, dtype=object)
+        return {
+            'trades': trades,
+            'by_ticker': self.summarize(trades, 'ticker_display'),
+            'by_sector': self.summarize(trades, 'sector', slots=sectors.value_counts().to_dict()),
+        }
+
+    def summarize(self, trades, by, slots=None):
+        """
+        Taxa de acerto, expectativa, retorno e drawdown máximo da carteira por
+        grupo. `slots` = {grupo: número de tickers} entre os quais o capital
+        é dividido (padrão: os tickers do grupo que operaram)
+        """
+        columns = ['trades', 'hit_rate', 'target_rate', 'stop_rate', 'expectancy_pct',
+                   'total_return_pct', 'max_drawdown_pct']
+        if trades.empty:
+            return pd.DataFrame(columns=columns)
+
+        slots = slots or {}
+        grouped = trades.groupby(by)
+        equity = {group: portfolio_equity(g, slots.get(group)) for group, g in grouped}
+        summary = pd.DataFrame({
+            'trades': grouped.size(),
+            'hit_rate': grouped['return'].apply(lambda r: (r > 0).mean() * 100),
+            'target_rate': grouped['outcome'].apply(lambda o: (o == 1).mean() * 100),
+            'stop_rate': grouped['outcome'].apply(lambda o: (o == -1).mean() * 100),
+            'expectancy_pct': grouped['return'].mean() * 100,
+            'total_return_pct': pd.Series({g: (e.iloc[-1] - 1) * 100 for g, e in equity.items()}),
+            'max_drawdown_pct': pd.Series({g: max_drawdown(e) * 100 for g, e in equity.items()}),
+        })
+        return summary.sort_values('expectancy_pct', ascending=False)
+
+
+def non_overlapping(bars, held, tickers=None):
+    """
+    Máscara das entradas efetivamente tomadas: sinal de um ticker com
+    posição ainda aberta é ignorado. Os sinais vêm ordenados por ticker e,
+    dentro dele, pelo índice do candle (`bars`); a posição aberta em `b`
+    termina no candle `b + held`, quando já se pode entrar de novo.
+    """
+    bars, held = np.asarray(bars), np.asarray(held)
+    tickers = np.zeros(len(bars), dtype=int) if tickers is None else np.asarray(tickers)
+    taken = np.zeros(len(bars), dtype=bool)
+    current, free_from = None, 0
+    for i, (ticker, bar, length) in enumerate(zip(tickers.tolist(), bars.tolist(), held.tolist())):
+        if ticker != current:
+            current, free_from = ticker, 0
+        if bar >= free_from:
+            taken[i] = True
+            free_from = bar + length
+    return taken
+
+
+def portfolio_equity(trades, slots=None):
+    """
+    Curva da carteira (base 1) nas datas de saída: capital dividido em
+    `slots` partes iguais (padrão: uma por ticker das operações), cada uma
+    reinvestida nas operações do seu ticker; partes sem operação ficam em caixa
+    """
+    if trades.empty:
+        return pd.Series([1.0])
+    growth = (1 + trades['return'].astype(float)).groupby(
+        [trades['exit_date'], trades['ticker']]
+    ).prod().unstack(fill_value=1.0)
+    sleeves = growth.cumprod()
+    slots = max(slots or 0, sleeves.shape[1])
+    return (sleeves.sum(axis=1) + slots - sleeves.shape[1]) / slots
+
+
+def max_drawdown(equity):
+    """Maior queda da curva de patrimônio (base 1) em relação ao pico anterior (0 a 1)"""
+    equity = np.asarray(equity, dtype=float)
+    if not len(equity):
+        return 0.0
+    peaks = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    return float((1 - equity / peaks).max())
+
+
+def main(argv=None):
+    """Backtest pela linha de comando: `python -m modules.backtesting [tickers]`"""
+    import argparse
+
+    from .database import AgroDatabase
+    from .price_store import PriceStore
+    from .technical_analysis import TechnicalAnalysisEngine
+
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.backtesting',
+        description='Backtest da estratégia (stop/alvo/prazo) com relatório por ticker e por setor'
+    )
+    parser.add_argument('tickers', nargs='*', help='tickers no formato do Yahoo (padrão: todo o universo)')
+    parser.add_argument('--stop', type=float, default=0.03, help='stop em fração do preço (padrão: 0.03)')
+    parser.add_argument('--target', type=float, default=0.15, help='alvo em fração do preço (padrão: 0.15)')
+    parser.add_argument('--horizon', type=int, default=5, help='prazo máximo em pregões (padrão: 5)')
+    parser.add_argument('--threshold', type=float, default=55, help='score mínimo de entrada (padrão: 55)')
+    parser.add_argument('--offline', action='store_true', help='usa só o histórico já armazenado')
+    parser.add_argument('--output', help='diretório onde gravar operações e resumos em CSV')
+    args = parser.parse_args(argv)
+
+    engine = BacktestEngine(
+        TechnicalAnalysisEngine(store=PriceStore()), AgroDatabase(), stop_pct=args.stop,
+        target_pct=args.target, horizon=args.horizon, entry_threshold=args.threshold
+    )
+    result = engine.run(frames=engine.load_history(args.tickers or None, offline=args.offline))
+
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        print(f"{len(result['trades'])} operações\n")
+        print("Por setor:")
+        print(result['by_sector'].round(2).to_string(), end='\n\n')
+        print("Por ticker:")
+        print(result['by_ticker'].round(2).to_string())
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        for name in ('trades', 'by_ticker', 'by_sector'):
+            result[name].to_csv(os.path.join(args.output, f'backtest_{name}.csv'), index=name != 'trades')
+        print(f"\nCSVs gravados em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Provedor Brapi (brapi.dev): Cotações, Histórico e Fundamentos da B3 em Lote
+"""
+
+import logging
+
+import pandas as pd
+import requests
+
+from .data_providers import ProviderError, QuotaExceeded
+from .http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+BRAPI_BASE_URL = 'https://brapi.dev/api'
+
+# Campos do score: (módulo, chave) no payload da Brapi, que segue o formato do Yahoo
+BRAPI_FUNDAMENTAL_FIELDS = {
+    'pe_ratio': (None, 'priceEarnings'),
+    'price_to_book': ('defaultKeyStatistics', 'priceToBook'),
+    'roe': ('financialData', 'returnOnEquity'),
+    'profit_margin': ('financialData', 'profitMargins'),
+}
+
+# Intervalos aceitos pelo parâmetro `range`, do menor para o maior (em dias)
+BRAPI_RANGES = [
+    ('5d', 5), ('1mo', 31), ('3mo', 92), ('6mo', 183), ('1y', 366),
+    ('2y', 731), ('5y', 1827), ('10y', 3653), ('max', None),
+]
+
+
+class BrapiProvider:
+    """
+    Busca vários tickers da B3 em uma única requisição (`/quote/A,B,C`),
+    trazendo histórico diário e fundamentos no mesmo payload. Cada
+    requisição consome a cota diária do plano; sem cota, levanta
+    QuotaExceeded e o roteador recorre ao próximo provedor.
+    """
+
+    name = 'brapi'
+
+    def __init__(self, token, tickers=None, base_url=BRAPI_BASE_URL, quota=None,
+                 chunk_size=10, timeout=15, session=None, cost=1):
+        self.token = token
+        self.cost = cost
+        # Tickers roteados para a Brapi (None = qualquer ticker .SA)
+        self.tickers = set(tickers) if tickers is not None else None
+        self.base_url = base_url.rstrip('/')
+        self.quota = quota
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        # Cliente HTTP compartilhado (pool de conexões e revalidação por ETag)
+        self.session = session or get_http_client()
+
+    def supports(self, ticker):
+        if self.tickers is not None:
+            return ticker in self.tickers
+        return ticker.endswith('.SA')
+
+    def history(self, tickers, period=None, start=None):
+        """Histórico diário ajustado: {ticker: DataFrame OHLCV}"""
+        range_ = _range_for_start(start) if start is not None else (period or '1y')
+        results = self.fetch(tickers, range_=range_)
+
+        frames = {}
+        for ticker, result in results.items():
+            df = _history_frame(result.get('historicalDataPrice'))
+            if start is not None and df is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            if df is not None and not df.empty:
+                frames[ticker] = df
+        return frames
+
+    def fundamentals(self, tickers, fields=None):
+        """Campos fundamentalistas do score: {ticker: {campo: valor}}"""
+        fields = BRAPI_FUNDAMENTAL_FIELDS if fields is None else {
+            f: BRAPI_FUNDAMENTAL_FIELDS[f] for f in fields if f in BRAPI_FUNDAMENTAL_FIELDS
+        }
+        modules = sorted({module for module, _ in fields.values() if module})
+        results = self.fetch(tickers, fundamental=True, modules=modules)
+
+        data = {}
+        for ticker, result in results.items():
+            values = {}
+            for field, (module, key) in fields.items():
+                source = result if module is None else (result.get(module) or {})
+                value = source.get(key)
+                if isinstance(value, dict):
+                    value = value.get('raw')
+                values[field] = value
+            values = {f: v for f, v in values.items() if v is not None}
+            if values:
+                data[ticker] = values
+        return data
+
+    def fetch(self, tickers, range_=None, fundamental=False, modules=None):
+        """
+        Payload bruto por ticker, em requisições de até `chunk_size` tickers.
+        Lotes que falharem ficam de fora (o roteador os envia a outro
+        provedor); só levanta erro se nada foi obtido.
+        """
+        tickers = [t for t in tickers if self.supports(t)]
+        results = {}
+        error = None
+        for i in range(0, len(tickers), self.chunk_size):
+            chunk = tickers[i:i + self.chunk_size]
+            if self.quota is not None and not self.quota.try_consume(self.name):
+                error = QuotaExceeded("Cota diária da Brapi esgotada")
+                break
+            try:
+                results.update(self._request(chunk, range_, fundamental, modules))
+            except ProviderError as exc:
+                logger.warning("Brapi falhou para %s: %s", ', '.join(chunk), exc)
+                error = exc
+
+        if error is not None and not results:
+            raise error
+        return results
+
+    def _request(self, tickers, range_, fundamental, modules):
+        symbols = {_to_symbol(t): t for t in tickers}
+        params = {'token': self.token}
+        if range_:
+            params.update({'range': range_, 'interval': '1d'})
+        if fundamental:
+            params['fundamental'] = 'true'
+        if modules:
+            params['modules'] = ','.join(modules)
+
+        try:
+            response = self.session.get(
+                f"{self.base_url}/quote/{','.join(symbols)}",
+                params=params,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            payload = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise ProviderError(f"Brapi: {exc}") from exc
+
+        return {
+            symbols[result['symbol']]: result
+            for result in payload.get('results') or []
+            if result.get('symbol') in symbols
+        }
+
+    def remaining_quota(self):
+        return self.quota.remaining(self.name) if self.quota is not None else None
+
+
+def _to_symbol(ticker):
+    # A Brapi usa o código da B3 sem o sufixo do Yahoo
+    return ticker[:-3] if ticker.endswith('.SA') else ticker
+
+
+def _range_for_start(start):
+    days = (pd.Timestamp.now().normalize() - pd.Timestamp(start).normalize()).days + 1
+    for range_, length in BRAPI_RANGES:
+        if length is None or days <= length:
+            return range_
+    return 'max'
+
+
+def _history_frame(prices):
+    """Converte `historicalDataPrice` em OHLCV ajustado, indexado pela data do pregão"""
+    if not prices:
+        return None
+    df = pd.DataFrame(prices).dropna(subset=['close'])
+    if df.empty:
+        return None
+
+    index = pd.to_datetime(df['date'], unit='s', utc=True).dt.tz_convert('America/Sao_Paulo')
+    df.index = pd.DatetimeIndex(index.dt.normalize().dt.tz_localize(None), name='Date')
+
+    # Mesmo critério do auto_adjust do yfinance: OHLC escalados pelo fator de ajuste
+    factor = df['adjustedClose'] / df['close'] if 'adjustedClose' in df else 1.0
+    frame = pd.DataFrame({
+        'Open': df['open'] * factor,
+        'High': df['high'] * factor,
+        'Low': df['low'] * factor,
+        'Close': df['close'] * factor,
+        'Volume': df['volume'],
+    })
+    return frame[~frame.index.duplicated(keep='last')].sort_index()
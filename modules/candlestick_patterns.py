@@ -0,0 +1,122 @@
+"""
+Padrões de Candlestick Vetorizados (máscaras sobre a matriz candles × tickers)
+"""
+
+import numpy as np
+import pandas as pd
+
+from .indicator_matrix import build_price_matrix
+
+# Viés de cada padrão: 1 = alta, -1 = baixa, 0 = indecisão
+PATTERN_BIAS = {
+    'BULLISH_ENGULFING': 1,
+    'BEARISH_ENGULFING': -1,
+    'HAMMER': 1,
+    'SHOOTING_STAR': -1,
+    'MORNING_STAR': 1,
+    'EVENING_STAR': -1,
+    'DOJI': 0,
+    'INSIDE_BAR': 0,
+}
+
+PATTERN_LABELS = {
+    'BULLISH_ENGULFING': 'Engolfo de Alta',
+    'BEARISH_ENGULFING': 'Engolfo de Baixa',
+    'HAMMER': 'Martelo',
+    'SHOOTING_STAR': 'Estrela Cadente',
+    'MORNING_STAR': 'Estrela da Manhã',
+    'EVENING_STAR': 'Estrela da Tarde',
+    'DOJI': 'Doji',
+    'INSIDE_BAR': 'Inside Bar',
+}
+
+
+class CandlestickPatternEngine:
+    """
+    Detecta os padrões como máscaras booleanas, todas de uma vez, sobre um
+    DataFrame OHLC de um ticker ou sobre as matrizes por campo do universo.
+    Corpo, sombras e amplitude são calculados uma vez e compartilhados.
+
+    Martelo e estrela cadente exigem o contexto de queda/alta dos últimos
+    `context_window` candles; candles com NaN (preenchimento da matriz)
+    nunca formam padrão.
+    """
+
+    def __init__(self, doji_body_pct=0.1, shadow_ratio=2.0, star_body_pct=0.3, context_window=3):
+        self.doji_body_pct = doji_body_pct
+        self.shadow_ratio = shadow_ratio
+        self.star_body_pct = star_body_pct
+        self.context_window = context_window
+
+    @property
+    def params(self):
+        """Parâmetros em forma hashable (para chaves de cache)"""
+        return tuple(sorted(vars(self).items()))
+
+    def detect(self, data):
+        """`data` é um DataFrame OHLC de um ticker ou um dict de matrizes por campo"""
+        open_, high, low, close = data['Open'], data['High'], data['Low'], data['Close']
+
+        body = (close - open_).abs()
+        price_range = high - low
+        upper_shadow = high - np.fmax(open_, close)
+        lower_shadow = np.fmin(open_, close) - low
+        bullish = close > open_
+        bearish = close < open_
+
+        prev_open, prev_close = open_.shift(1), close.shift(1)
+        prev_high, prev_low = high.shift(1), low.shift(1)
+        prev_body = body.shift(1)
+        prev_bullish, prev_bearish = bullish.shift(1, fill_value=False), bearish.shift(1, fill_value=False)
+
+        # Contexto: variação do fechamento nos candles anteriores
+        past_close = close.shift(self.context_window + 1)
+        falling = prev_close < past_close
+        rising = prev_close > past_close
+
+        small_upper = upper_shadow <= body
+        small_lower = lower_shadow <= body
+        long_lower = lower_shadow >= self.shadow_ratio * body
+        long_upper = upper_shadow >= self.shadow_ratio * body
+
+        # Estrelas: candle longo, candle de corpo pequeno e reversão além do meio do primeiro
+        first_open, first_close = open_.shift(2), close.shift(2)
+        first_body = body.shift(2)
+        first_mid = (first_open + first_close) / 2
+        small_middle = prev_body <= self.star_body_pct * first_body
+
+        masks = {
+            'BULLISH_ENGULFING': (
+                prev_bearish & bullish & (open_ <= prev_close) & (close >= prev_open) & (body > prev_body)
+            ),
+            'BEARISH_ENGULFING': (
+                prev_bullish & bearish & (open_ >= prev_close) & (close <= prev_open) & (body > prev_body)
+            ),
+            'HAMMER': (price_range > 0) & long_lower & small_upper & falling,
+            'SHOOTING_STAR': (price_range > 0) & long_upper & small_lower & rising,
+            'MORNING_STAR': (
+                bearish.shift(2, fill_value=False) & small_middle & bullish & (close > first_mid)
+            ),
+            'EVENING_STAR': (
+                bullish.shift(2, fill_value=False) & small_middle & bearish & (close < first_mid)
+            ),
+            'DOJI': (price_range > 0) & (body <= self.doji_body_pct * price_range),
+            'INSIDE_BAR': (high < prev_high) & (low > prev_low),
+        }
+        return {name: mask.astype(bool) for name, mask in masks.items()}
+
+    def signal(self, masks):
+        """Viés líquido por candle, limitado a -1..1 (soma dos vieses dos padrões)"""
+        total = sum(bias * masks[name].astype(int) for name, bias in PATTERN_BIAS.items())
+        return np.clip(total, -1, 1)
+
+    def scan(self, frames):
+        """
+        Padrões do último candle de cada ticker do universo em uma passada:
+        DataFrame tickers × padrões (booleano)
+        """
+        frames = {t: df for t, df in frames.items() if df is not None and len(df)}
+        if not frames:
+            return pd.DataFrame(columns=list(PATTERN_BIAS))
+        masks = self.detect(build_price_matrix(frames, fields=['Open', 'High', 'Low', 'Close']))
+        return pd.DataFrame({name: mask.iloc[-1] for name, mask in masks.items()})
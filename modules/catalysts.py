@@ -0,0 +1,227 @@
+"""
+Detecção de Catalisadores em Notícias (autômato de Aho-Corasick)
+"""
+
+import unicodedata
+
+from .request_cache import LRUCache
+
+CATALYST_LABELS = {
+    'SAFRA': 'Estimativa de Safra',
+    'CLIMA': 'Clima (Geada/Seca)',
+    'EXPORTACAO': 'Restrição à Exportação',
+    'M&A': 'Fusões e Aquisições',
+    'RESULTADOS': 'Resultados',
+    'DIVIDENDOS': 'Dividendos e Proventos',
+}
+
+# Termos sem acentos e em minúsculas; `*` no fim aceita qualquer continuação da palavra
+CATALYST_PATTERNS = {
+    'SAFRA': [
+        'safra', 'safras', 'safrinha', 'supersafra', 'quebra de safra', 'estimativa de safra',
+        'estimativas de safra', 'previsao de safra', 'levantamento de safra', 'conab', 'usda',
+        'wasde', 'colheita*', 'plantio', 'semeadura', 'area plantada', 'produtividade',
+        'producao de soja', 'producao de milho', 'producao de cana', 'producao de cafe',
+        'moagem', 'crop report', 'crop estimate*', 'crop forecast*', 'crop progress',
+        'harvest*', 'planting*', 'acreage', 'yield forecast*', 'yield estimate*',
+        'bumper crop', 'record crop', 'crop failure', 'grain stocks', 'stocks report',
+    ],
+    'CLIMA': [
+        'geada*', 'seca', 'secas', 'estiagem', 'veranico', 'onda de calor', 'ondas de calor',
+        'chuva excessiva', 'chuvas excessivas', 'excesso de chuva*', 'falta de chuva*',
+        'enchente*', 'inundac*', 'granizo', 'la nina', 'el nino', 'crise hidrica',
+        'queimada*', 'incendio*', 'clima adverso', 'evento climatico', 'eventos climaticos',
+        'frost*', 'freeze', 'drought*', 'dry spell', 'heat wave*', 'heatwave*', 'flood*',
+        'hailstorm*', 'wildfire*', 'adverse weather', 'weather risk*',
+    ],
+    'EXPORTACAO': [
+        'embargo*', 'proibicao de exportac*', 'proibe exportac*', 'suspensao de exportac*',
+        'suspende exportac*', 'suspende importac*', 'suspensao das importac*',
+        'restricao a exportac*', 'restricoes a exportac*', 'barreira sanitaria',
+        'barreiras sanitarias', 'barreira comercial', 'barreiras comerciais',
+        'cota de exportac*', 'tarifa de importac*', 'sobretaxa*', 'antidumping',
+        'habilitacao de frigorific*', 'desabilita*', 'caso atipico', 'vaca louca',
+        'gripe aviaria', 'peste suina', 'febre aftosa',
+        'export ban*', 'bans export*', 'banned export*', 'import ban*', 'export restriction*',
+        'export curb*', 'export quota*', 'export tax*', 'tariff*', 'trade war',
+        'trade barrier*', 'bird flu', 'avian flu', 'swine fever', 'mad cow',
+    ],
+    'M&A': [
+        'fusao', 'fusoes', 'aquisicao', 'aquisicoes', 'adquire', 'adquiriu', 'adquirir',
+        'compra de participac*', 'venda de participac*', 'vende participac*',
+        'incorporacao', 'incorpora', 'oferta publica de aquisicao', 'opa', 'joint venture',
+        'combinacao de negocios', 'cisao', 'spin off', 'desinvestimento*', 'compra da',
+        'merger*', 'acquisition*', 'acquire*', 'takeover*', 'buyout*', 'tender offer',
+        'divest*', 'spinoff', 'to buy', 'agrees to buy', 'stake sale', 'deal to',
+    ],
+    'RESULTADOS': [
+        'balanco', 'balancos', 'resultado trimestral', 'resultados trimestrais',
+        'resultado do trimestre', 'lucro liquido', 'prejuizo liquido', 'ebitda',
+        'receita liquida', 'margem bruta', 'margem ebitda', 'teleconferencia de resultados',
+        '1t2*', '2t2*', '3t2*', '4t2*', 'primeiro trimestre', 'segundo trimestre',
+        'terceiro trimestre', 'quarto trimestre', 'guidance', 'projecoes',
+        'earnings', 'quarterly results', 'quarterly profit', 'quarterly loss',
+        'net income', 'net loss', 'revenue*', 'eps', 'earnings per share', 'q1', 'q2', 'q3',
+        'q4', 'fiscal year', 'beats estimates', 'misses estimates', 'profit warning',
+        'raises outlook', 'cuts outlook',
+    ],
+    'DIVIDENDOS': [
+        'dividendo*', 'juros sobre capital proprio', 'jcp', 'proventos', 'data com',
+        'data ex', 'bonificacao', 'recompra de aco*', 'programa de recompra', 'dividend yield',
+        'rendimento mensal', 'rendimentos mensais', 'distribuicao de rendimento*',
+        'dividend*', 'payout', 'buyback*', 'share repurchase*', 'special dividend',
+        'ex dividend', 'dividend increase', 'dividend cut',
+    ],
+}
+
+
+def _fold_table():
+    """
+    Tabela de `str.translate` que remove acentos, passa para minúsculas e
+    troca pontuação por espaço caractere a caractere: o texto mantém o
+    tamanho, então as posições encontradas valem também no original
+    """
+    table = {}
+    for code in range(0x250):
+        char = chr(code)
+        base = ''.join(
+            c for c in unicodedata.normalize('NFKD', char) if not unicodedata.combining(c)
+        ).lower()
+        if len(base) == 1 and base.isalnum() and base.isascii():
+            table[code] = base
+        else:
+            table[code] = ' '
+    # Travessões, aspas curvas e demais sinais da pontuação geral
+    for code in range(0x2000, 0x2070):
+        table[code] = ' '
+    return table
+
+
+FOLD_TABLE = _fold_table()
+
+
+class AhoCorasick:
+    """
+    Autômato de Aho-Corasick com as transições já resolvidas (DFA): cada
+    caractere custa uma consulta a dicionário, e todos os termos são
+    encontrados em uma única passada pelo texto
+    """
+
+    def __init__(self, patterns):
+        # patterns: lista de (termo, valor)
+        self.values = []
+        goto, outputs = [{}], [[]]
+        for term, value in patterns:
+            state = 0
+            for char in term:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append(len(self.values))
+            self.values.append((term, value))
+
+        # Busca em largura: falha de cada estado e transições completas
+        alphabet = {char for transitions in goto for char in transitions}
+        fail = [0] * len(goto)
+        self.delta = [dict() for _ in goto]
+        self.delta[0] = {char: goto[0].get(char, 0) for char in alphabet}
+        queue = list(goto[0].values())
+        while queue:
+            next_queue = []
+            for state in queue:
+                outputs[state] = outputs[state] + outputs[fail[state]]
+                transitions = dict(self.delta[fail[state]])
+                for char, child in goto[state].items():
+                    fail[child] = self.delta[fail[state]][char]
+                    transitions[char] = child
+                    next_queue.append(child)
+                self.delta[state] = transitions
+            queue = next_queue
+        self.outputs = [tuple(o) for o in outputs]
+
+    def iter(self, text):
+        """(fim exclusivo, índice do termo) de cada ocorrência, inclusive sobrepostas"""
+        delta, outputs = self.delta, self.outputs
+        state = 0
+        for position, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                for index in outputs[state]:
+                    yield position + 1, index
+
+
+class CatalystDetector:
+    """
+    Marca catalisadores (safra, clima, exportação, M&A, resultados e
+    dividendos) no título e no resumo das notícias. Todos os termos, em
+    português e inglês, formam um único autômato; o texto é percorrido uma
+    vez e cada ocorrência é validada nos limites de palavra.
+    """
+
+    def __init__(self, patterns=CATALYST_PATTERNS, cache_size=20000):
+        terms = []
+        for category, category_terms in patterns.items():
+            for term in category_terms:
+                prefix = term.endswith('*')
+                terms.append((term.rstrip('*'), (category, prefix)))
+        self.automaton = AhoCorasick(terms)
+        self.cache = LRUCache(maxsize=cache_size)
+
+    def __len__(self):
+        return len(self.automaton.values)
+
+    def scan(self, text):
+        """Ocorrências no texto: categoria, termo e posição (início, fim) no original"""
+        folded = f' {(text or "").translate(FOLD_TABLE)} '
+        matches = []
+        for end, index in self.automaton.iter(folded):
+            term, (category, prefix) = self.automaton.values[index]
+            start = end - len(term)
+            if folded[start - 1] != ' ' or (not prefix and folded[end] != ' '):
+                continue
+            if prefix:
+                # O termo com `*` vale até o fim da palavra
+                while folded[end] != ' ':
+                    end += 1
+            matches.append({
+                'category': category,
+                'term': text[start - 1:end - 1],
+                'start': start - 1,
+                'end': end - 1,
+            })
+        return _drop_overlaps(matches)
+
+    def detect(self, article):
+        """Catalisadores de uma notícia, com o campo (title/summary) de cada ocorrência"""
+        key = article.get('id')
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached
+
+        tags = []
+        for field in ('title', 'summary'):
+            for match in self.scan(article.get(field)):
+                tags.append({**match, 'field': field, 'label': CATALYST_LABELS.get(match['category'])})
+        if key:
+            self.cache.set(key, tags)
+        return tags
+
+    def detect_batch(self, articles):
+        """{id da notícia: catalisadores}"""
+        return {article['id']: self.detect(article) for article in articles}
+
+
+def _drop_overlaps(matches):
+    # Entre ocorrências sobrepostas da mesma categoria fica a mais longa
+    matches.sort(key=lambda m: (m['start'], -(m['end'] - m['start'])))
+    kept = []
+    for match in matches:
+        if any(
+            k['category'] == match['category'] and match['start'] < k['end'] and k['start'] < match['end']
+            for k in kept
+        ):
+            continue
+        kept.append(match)
+    return kept
@@ -0,0 +1,435 @@
+"""
+Provedores de Dados com Roteamento por Custo, Failover e Circuit Breaker
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+
+import yfinance as yf
+from yfinance.data import YfData
+
+logger = logging.getLogger(__name__)
+
+_QUOTE_URL = 'https://query1.finance.yahoo.com/v7/finance/quote'
+_QUOTE_SUMMARY_URL = 'https://query2.finance.yahoo.com/v10/finance/quoteSummary'
+
+# Erros do yfinance que indicam rede, HTTP ou bloqueio (e não falta de dados do ticker)
+_TRANSIENT_YAHOO_ERRORS = re.compile(
+    r'RateLimit|Too Many Requests|Timeout|timed out|Connection|DNSError|curl|HTTPError|SSL',
+    re.IGNORECASE
+)
+
+# Campos usados pelo score: (módulo do quoteSummary, chave no Yahoo)
+FUNDAMENTAL_FIELDS = {
+    'pe_ratio': ('summaryDetail', 'trailingPE'),
+    'price_to_book': ('defaultKeyStatistics', 'priceToBook'),
+    'roe': ('financialData', 'returnOnEquity'),
+    'profit_margin': ('financialData', 'profitMargins'),
+}
+
+# Campos que o endpoint de cotações entrega para vários tickers de uma vez
+BULK_QUOTE_FIELDS = {
+    'pe_ratio': 'trailingPE',
+    'price_to_book': 'priceToBook',
+}
+
+
+class ProviderError(Exception):
+    """Falha de um provedor (rede, HTTP, resposta inválida ou bloqueio)"""
+
+
+class QuotaExceeded(ProviderError):
+    """Cota do provedor esgotada: não adianta tentar de novo agora"""
+
+
+class CircuitBreaker:
+    """
+    Após `failure_threshold` falhas seguidas o circuito abre e o provedor
+    deixa de ser consultado por `reset_timeout` segundos; depois disso uma
+    chamada de teste (meio-aberto) decide se ele volta ou continua fora
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=300):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            # Meio-aberto: só uma chamada de teste por vez
+            if state == 'half-open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def release(self):
+        """Devolve a chamada de teste reservada por `allow()` sem registrar resultado"""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class ProviderMetrics:
+    """Contadores e latência de um provedor (seguros entre threads)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.last_latency = None
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def record(self, latency, error=None):
+        with self._lock:
+            self.requests += 1
+            self.total_latency += latency
+            self.last_latency = latency
+            if error is not None:
+                self.failures += 1
+                self.last_error = str(error)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'failures': self.failures,
+                'success_rate': (
+                    (self.requests - self.failures) / self.requests * 100 if self.requests else None
+                ),
+                'avg_latency_ms': self.total_latency / self.requests * 1000 if self.requests else None,
+                'last_latency_ms': self.last_latency * 1000 if self.last_latency is not None else None,
+                'last_error': self.last_error,
+            }
+
+
+class ProviderRouter:
+    """
+    Encaminha cada operação ('history', 'intraday', 'fundamentals', 'info')
+    ao provedor de menor custo que atende o ticker, está com o circuito
+    fechado e ainda tem cota. Falhas são repetidas até `max_retries` vezes
+    com backoff exponencial; esgotadas as tentativas, ou se o provedor não
+    trouxer algum ticker, o próximo provedor assume.
+    """
+
+    def __init__(self, providers, max_retries=2, backoff=0.5, max_backoff=8.0,
+                 failure_threshold=5, reset_timeout=300):
+        self.providers = sorted(providers, key=lambda p: p.cost)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breakers = {
+            p.name: CircuitBreaker(failure_threshold, reset_timeout) for p in self.providers
+        }
+        self.provider_metrics = {p.name: ProviderMetrics() for p in self.providers}
+
+    def get(self, name):
+        return next((p for p in self.providers if p.name == name), None)
+
+    def call(self, operation, tickers, complete=None, **kwargs):
+        """
+        Resultado {ticker: valor} combinando os provedores necessários.
+        `complete(valor)` diz se o resultado parcial de um ticker já basta;
+        dicts incompletos são complementados pelos provedores seguintes.
+        """
+        pending = list(dict.fromkeys(tickers))
+        results = {}
+        for provider in self.providers:
+            subset = [t for t in pending if provider.supports(t)]
+            if not subset or not hasattr(provider, operation) or not self._available(provider):
+                continue
+
+            try:
+                fetched = self._call_with_retries(provider, operation, subset, kwargs)
+            except QuotaExceeded:
+                logger.info("Cota de %s esgotada; seguindo para o próximo provedor", provider.name)
+                continue
+            except ProviderError as exc:
+                logger.warning("%s.%s falhou para %d tickers: %s", provider.name, operation, len(subset), exc)
+                continue
+
+            for ticker, value in fetched.items():
+                results[ticker] = _merge(results.get(ticker), value)
+            pending = [
+                t for t in pending
+                if t not in results or (complete is not None and not complete(results[t]))
+            ]
+            if not pending:
+                break
+
+        missing = [t for t in pending if t not in results]
+        if missing:
+            logger.warning("Sem dados de %s (%s) em nenhum provedor", operation, ', '.join(missing))
+        return results
+
+    def _available(self, provider):
+        # O disjuntor por último: `allow()` pode reservar a chamada de teste
+        remaining = provider.remaining_quota()
+        if remaining is not None and remaining <= 0:
+            return False
+        return self.breakers[provider.name].allow()
+
+    def _call_with_retries(self, provider, operation, tickers, kwargs):
+        breaker = self.breakers[provider.name]
+        metrics = self.provider_metrics[provider.name]
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            try:
+                result = getattr(provider, operation)(tickers, **kwargs)
+            except QuotaExceeded as exc:
+                # Cota não diz nada sobre a saúde do provedor: libera a chamada de teste
+                metrics.record(time.monotonic() - started, exc)
+                breaker.release()
+                raise
+            except Exception as exc:
+                metrics.record(time.monotonic() - started, exc)
+                if attempt == self.max_retries:
+                    breaker.record_failure()
+                    if isinstance(exc, ProviderError):
+                        raise
+                    raise ProviderError(str(exc)) from exc
+                # Backoff exponencial com jitter
+                delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+            else:
+                metrics.record(time.monotonic() - started)
+                breaker.record_success()
+                return result
+
+    def metrics(self):
+        """Saúde de cada provedor: contadores, latência, circuito e cota restante"""
+        return {
+            provider.name: {
+                **self.provider_metrics[provider.name].as_dict(),
+                'cost': provider.cost,
+                'circuit': self.breakers[provider.name].state,
+                'quota_remaining': provider.remaining_quota(),
+            }
+            for provider in self.providers
+        }
+
+
+def _merge(current, new):
+    # O provedor mais barato (consultado antes) prevalece; dicts são complementados
+    if current is None:
+        return new
+    if isinstance(current, dict) and isinstance(new, dict):
+        return {**new, **{k: v for k, v in current.items() if v is not None}}
+    return current
+
+
+def fields_complete(fields):
+    """Critério de `complete` para fundamentos: todos os campos pedidos preenchidos"""
+    return lambda values: all(values.get(f) is not None for f in fields)
+
+
+class YahooProvider:
+    """
+    Yahoo Finance via yfinance: histórico e intradiário em lote, fundamentos
+    pelo endpoint de cotações (vários tickers) e pelo quoteSummary
+    """
+
+    name = 'yahoo'
+
+    def __init__(self, rate_limiter=None, cost=2, bulk_chunk_size=50):
+        self.rate_limiter = rate_limiter
+        self.cost = cost
+        self.bulk_chunk_size = bulk_chunk_size
+
+    def supports(self, ticker):
+        return True
+
+    def remaining_quota(self):
+        return None
+
+    def _throttle(self):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire('yahoo')
+
+    def history(self, tickers, period=None, start=None):
+        kwargs = {'start': start} if start is not None else {'period': period or '1y'}
+        return self._download(tickers, **kwargs)
+
+    def intraday(self, tickers, interval='1m'):
+        return self._download(tickers, period='1d', interval=interval)
+
+    def _download(self, tickers, **kwargs):
+        """
+        {ticker: DataFrame}; tickers sem dados (deslistados, sem pregão no
+        período) simplesmente ficam de fora. Só levanta erro se nada veio
+        e algum ticker falhou por rede, HTTP ou bloqueio.
+        """
+        self._throttle()
+        # O yfinance não levanta exceções no download: as falhas só aparecem no log
+        errors = _YahooErrorCollector(tickers)
+        yf_logger = logging.getLogger('yfinance')
+        yf_logger.addHandler(errors)
+        try:
+            data = yf.download(
+                tickers,
+                group_by='ticker',
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                **kwargs
+            )
+        finally:
+            yf_logger.removeHandler(errors)
+
+        frames = split_batch(data, tickers)
+        if not frames and errors.transient:
+            raise ProviderError(f"Yahoo falhou: {errors.transient[-1]}")
+        return frames
+
+    def fundamentals(self, tickers, fields=None):
+        """{ticker: {campo: valor}}, com os campos de valuation em lote"""
+        fields = set(FUNDAMENTAL_FIELDS if fields is None else fields)
+        results = {ticker: {} for ticker in tickers}
+        errors = []
+
+        bulk_fields = {f: key for f, key in BULK_QUOTE_FIELDS.items() if f in fields}
+        if bulk_fields:
+            for i in range(0, len(tickers), self.bulk_chunk_size):
+                try:
+                    quotes = self._fetch_bulk_quotes(tickers[i:i + self.bulk_chunk_size], bulk_fields)
+                except Exception as exc:
+                    errors.append(exc)
+                    continue
+                for ticker, quote in quotes.items():
+                    results[ticker].update({f: quote.get(key) for f, key in bulk_fields.items()})
+
+        # Demais campos (e o que faltou no lote): quoteSummary só com os módulos necessários
+        for ticker in tickers:
+            missing = {
+                f: FUNDAMENTAL_FIELDS[f] for f in fields
+                if f in FUNDAMENTAL_FIELDS and results[ticker].get(f) is None
+            }
+            if not missing:
+                continue
+            try:
+                results[ticker].update(self._fetch_summary_fields(ticker, missing))
+            except Exception as exc:
+                # 404 = ticker sem fundamentos no Yahoo, não falha do provedor
+                if _status_code(exc) != 404:
+                    errors.append(exc)
+
+        results = {t: data for t, data in results.items() if data}
+        if errors and not results:
+            raise ProviderError(f"Yahoo falhou ao buscar fundamentos: {errors[-1]}")
+        return results
+
+    def info(self, tickers):
+        """Payload completo do `.info`"""
+        results = {}
+        for ticker in tickers:
+            self._throttle()
+            results[ticker] = yf.Ticker(ticker).info
+        return results
+
+    def _fetch_bulk_quotes(self, tickers, fields):
+        self._throttle()
+        data = YfData().get_raw_json(
+            _QUOTE_URL,
+            params={
+                'symbols': ','.join(tickers),
+                'fields': ','.join(fields.values()),
+                'formatted': 'false',
+            }
+        )
+        quotes = data.get('quoteResponse', {}).get('result') or []
+        return {quote['symbol']: quote for quote in quotes if quote.get('symbol') in tickers}
+
+    def _fetch_summary_fields(self, ticker, fields):
+        modules = sorted({module for module, _ in fields.values()})
+        self._throttle()
+        data = YfData().get_raw_json(
+            f'{_QUOTE_SUMMARY_URL}/{ticker}',
+            params={
+                'modules': ','.join(modules),
+                'corsDomain': 'finance.yahoo.com',
+                'formatted': 'false',
+                'symbol': ticker,
+            }
+        )
+        result = (data.get('quoteSummary', {}).get('result') or [{}])[0]
+
+        values = {}
+        for field, (module, key) in fields.items():
+            value = (result.get(module) or {}).get(key)
+            if isinstance(value, dict):
+                value = value.get('raw')
+            values[field] = value
+        return values
+
+
+def _status_code(exc):
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+class _YahooErrorCollector(logging.Handler):
+    """Guarda as falhas transitórias que o yfinance registra para os tickers do lote"""
+
+    def __init__(self, tickers):
+        super().__init__(level=logging.ERROR)
+        self.tickers = set(tickers)
+        self.transient = []
+
+    def emit(self, record):
+        message = record.getMessage()
+        cited = {t for t in self.tickers if f"'{t}'" in message}
+        if cited and _TRANSIENT_YAHOO_ERRORS.search(message):
+            self.transient.append(message)
+
+
+def split_batch(data, tickers):
+    """Separa o DataFrame agrupado do yf.download em um DataFrame por ticker"""
+    frames = {}
+    if data is None or data.empty:
+        return frames
+
+    columns = data.columns
+    for ticker in tickers:
+        if getattr(columns, 'nlevels', 1) > 1:
+            if ticker not in columns.get_level_values(0):
+                continue
+            df = data[ticker]
+        elif len(tickers) == 1:
+            df = data
+        else:
+            continue
+        df = df.dropna(how='all')
+        if 'Close' in df.columns:
+            df = df[df['Close'].notna()]
+        if not df.empty:
+            frames[ticker] = df
+    return frames
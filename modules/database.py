@@ -93,6 +93,13 @@ class AgroDatabase:
             tickers.extend(list(self.data[category].keys()))
         return tickers
     
+    def get_tickers(self, categories):
+        """Tickers das categorias informadas (ex.: ['acoes_br', 'fiagros'])"""
+        tickers = []
+        for category in categories:
+            tickers.extend(list(self.data[category].keys()))
+        return tickers
+    
     def get_ticker_info(self, ticker):
         """Retorna informações de um ticker específico"""
         for category in self.data.values():
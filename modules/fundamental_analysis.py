@@ -1,18 +1,76 @@
-import yfinance as yf
+import logging
+
+from .data_providers import FUNDAMENTAL_FIELDS, ProviderRouter, YahooProvider, fields_complete
+
+logger = logging.getLogger(__name__)
 
 class FundamentalAnalysisEngine:
+    def __init__(self, rate_limiter=None, cache=None, bulk_chunk_size=50, providers=None):
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        # Roteador de provedores (por padrão, só o Yahoo)
+        self.providers = providers or ProviderRouter([
+            YahooProvider(rate_limiter, bulk_chunk_size=bulk_chunk_size)
+        ])
+    
     def get_fundamental_data(self, ticker):
-        try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            return {
-                'pe_ratio': info.get('trailingPE'),
-                'price_to_book': info.get('priceToBook'),
-                'roe': info.get('returnOnEquity'),
-                'profit_margin': info.get('profitMargins'),
-            }
-        except:
-            return None
+        if self.cache is not None:
+            return self.cache.get(ticker, self._fetch_fundamental_data)
+        return self._fetch_fundamental_data(ticker)
+    
+    def get_fundamental_data_batch(self, tickers):
+        """
+        Carrega os fundamentos de vários tickers. Só quem não tem nada em
+        cache é buscado na hora; campos vencidos são servidos do cache e
+        atualizados em lote, em segundo plano (stale-while-revalidate)
+        """
+        tickers = list(tickers)
+        if self.cache is None:
+            fetched = self._fetch_fields_batch({t: set(FUNDAMENTAL_FIELDS) for t in tickers})
+            return {t: fetched.get(t) for t in tickers}
+        
+        cached = {t: self.cache.peek(t) for t in tickers}
+        missing = [t for t in tickers if cached[t] is None]
+        fetched = self._fetch_fields_batch({t: set(FUNDAMENTAL_FIELDS) for t in missing}) if missing else {}
+        for ticker, data in fetched.items():
+            self.cache.set(ticker, data)
+            cached[ticker] = data
+        
+        stale = {}
+        for ticker in tickers:
+            if ticker not in missing:
+                fields = self.cache.stale_fields(ticker, FUNDAMENTAL_FIELDS)
+                if fields:
+                    stale[ticker] = fields
+        if stale:
+            self.cache.refresh_batch_in_background(stale, self._fetch_fields_batch)
+        return {t: cached[t] for t in tickers}
+    
+    def get_full_fundamental_data(self, ticker):
+        """Payload completo do `.info` (apenas para a visão detalhada)"""
+        return self.providers.call('info', [ticker]).get(ticker)
+    
+    def _fetch_fundamental_data(self, ticker):
+        data = self._fetch_fields_batch({ticker: set(FUNDAMENTAL_FIELDS)}).get(ticker)
+        return data if data else None
+    
+    def _fetch_fields_batch(self, needed):
+        """Busca apenas os campos pedidos para cada ticker ({ticker: {campos}})"""
+        # Tickers que precisam dos mesmos campos seguem juntos para o roteador
+        groups = {}
+        for ticker, fields in needed.items():
+            groups.setdefault(frozenset(fields), []).append(ticker)
+        
+        results = {}
+        for fields, tickers in groups.items():
+            fetched = self.providers.call(
+                'fundamentals', tickers, complete=fields_complete(fields), fields=set(fields)
+            )
+            for ticker, data in fetched.items():
+                data = {f: v for f, v in data.items() if f in fields}
+                if data:
+                    results[ticker] = data
+        return results
     
     def analyze_valuation(self, fundamentals):
         if not fundamentals:
@@ -0,0 +1,142 @@
+"""
+Cache Persistente de Dados Fundamentalistas
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.path.join('data', 'fundamentals.db')
+
+# Validade de cada campo, em segundos
+DEFAULT_TTLS = {
+    'pe_ratio': 24 * 3600,              # acompanha o preço: diário
+    'price_to_book': 24 * 3600,
+    'roe': 90 * 24 * 3600,              # muda com os balanços trimestrais
+    'profit_margin': 90 * 24 * 3600,
+}
+
+
+class FundamentalsCache:
+    """
+    Cache em disco com validade por campo e stale-while-revalidate:
+    entradas vencidas continuam sendo servidas enquanto são atualizadas
+    em segundo plano
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, ttls=None, default_ttl=24 * 3600):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fundamentals (
+                    ticker TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value TEXT,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (ticker, field)
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, ticker, loader):
+        """Retorna os fundamentos do ticker, usando `loader(ticker)` quando necessário"""
+        entries = self._read(ticker)
+        if not entries:
+            data = loader(ticker)
+            if data is not None:
+                self.set(ticker, data)
+            return data
+
+        now = time.time()
+        stale = any(
+            now - fetched_at > self.ttls.get(field, self.default_ttl)
+            for field, (_, fetched_at) in entries.items()
+        )
+        if stale:
+            self._refresh_in_background(ticker, loader)
+
+        return {field: value for field, (value, _) in entries.items()}
+
+    def peek(self, ticker):
+        """Valores em cache, sem buscar nem atualizar (None se ausente)"""
+        entries = self._read(ticker)
+        return {field: value for field, (value, _) in entries.items()} if entries else None
+
+    def stale_fields(self, ticker, fields):
+        """Campos ausentes ou vencidos para o ticker"""
+        entries = self._read(ticker)
+        now = time.time()
+        return {
+            field for field in fields
+            if field not in entries
+            or now - entries[field][1] > self.ttls.get(field, self.default_ttl)
+        }
+
+    def set(self, ticker, data):
+        now = time.time()
+        rows = [(ticker, field, json.dumps(value), now) for field, value in data.items()]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fundamentals (ticker, field, value, fetched_at) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def _read(self, ticker):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT field, value, fetched_at FROM fundamentals WHERE ticker = ?",
+                (ticker,)
+            ).fetchall()
+        return {field: (json.loads(value), fetched_at) for field, value, fetched_at in rows}
+
+    def refresh_batch_in_background(self, needed, loader):
+        """
+        Atualiza em segundo plano vários tickers de uma vez com
+        `loader({ticker: campos})`, que retorna {ticker: dados}. Tickers já
+        em atualização ficam de fora.
+        """
+        with self._lock:
+            needed = {t: f for t, f in needed.items() if t not in self._refreshing}
+            self._refreshing.update(needed)
+        if not needed:
+            return
+
+        def refresh():
+            try:
+                for ticker, data in loader(needed).items():
+                    self.set(ticker, data)
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(needed)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _refresh_in_background(self, ticker, loader):
+        with self._lock:
+            if ticker in self._refreshing:
+                return
+            self._refreshing.add(ticker)
+
+        def refresh():
+            try:
+                data = loader(ticker)
+                if data is not None:
+                    self.set(ticker, data)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(ticker)
+
+        threading.Thread(target=refresh, daemon=True).start()
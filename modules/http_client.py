@@ -0,0 +1,215 @@
+"""
+Cliente HTTP Compartilhado (pool de conexões, gzip e requisições condicionais)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join('data', 'http_cache.db')
+
+# Conexões simultâneas por host: acima disso as requisições aguardam no pool
+DEFAULT_HOST_LIMITS = {
+    'brapi.dev': 4,
+    'finnhub.io': 4,
+    'newsapi.org': 2,
+}
+
+# Respostas guardadas já vêm descompactadas; estes cabeçalhos deixam de valer
+_DROPPED_HEADERS = ('Content-Encoding', 'Content-Length', 'Transfer-Encoding')
+
+
+class ResponseCache:
+    """
+    Respostas com ETag/Last-Modified gravadas em SQLite, para revalidar com
+    If-None-Match/If-Modified-Since. A chave é um hash da URL completa, de
+    modo que tokens na query string não ficam gravados em disco.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age_days=7):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            # Entradas sem uso há muito tempo só ocupam espaço
+            conn.execute(
+                "DELETE FROM responses WHERE fetched_at < ?",
+                (time.time() - max_age_days * 86400,)
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT etag, last_modified, status, headers, content FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, status, headers, content = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'status': status,
+            'headers': json.loads(headers),
+            'content': content,
+        }
+
+    def put(self, key, response):
+        headers = {
+            k: v for k, v in response.headers.items() if k not in _DROPPED_HEADERS
+        }
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, etag, last_modified, status, headers, content, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    response.status_code,
+                    json.dumps(headers),
+                    response.content,
+                    time.time(),
+                )
+            )
+
+    def touch(self, key):
+        with self._connect() as conn:
+            conn.execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), key))
+
+
+class HTTPClient:
+    """
+    Sessão `requests` única para os provedores HTTP: conexões keep-alive
+    reaproveitadas entre varreduras, limite de conexões por host, gzip e
+    GETs condicionais. Um 304 devolve o corpo guardado, sem baixar de novo.
+
+    O yfinance fica de fora: ele exige a sessão curl_cffi própria (que
+    imita um navegador) e recusa sessões com cache.
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, pool_connections=10, pool_maxsize=10,
+                 host_limits=None, timeout=15):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'User-Agent': 'agro-monitor-pro',
+        })
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Prefixos mais específicos têm precedência no requests
+        for host, limit in (DEFAULT_HOST_LIMITS if host_limits is None else host_limits).items():
+            self.session.mount(
+                f'https://{host}/',
+                HTTPAdapter(pool_connections=1, pool_maxsize=limit, pool_block=True)
+            )
+
+        self.cache = ResponseCache(cache_path) if cache_path else None
+        self.stats = {'requests': 0, 'not_modified': 0, 'stored': 0}
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, headers=None, timeout=None, conditional=True, **kwargs):
+        """
+        GET pela sessão compartilhada. Com `conditional`, envia os validadores
+        da última resposta guardada; a resposta devolvida tem `from_cache`
+        verdadeiro quando o servidor respondeu 304.
+        """
+        key = _cache_key(url, params) if conditional and self.cache is not None else None
+        cached = self.cache.get(key) if key else None
+
+        headers = dict(headers or {})
+        if cached is not None:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        response = self.session.get(
+            url, params=params, headers=headers, timeout=timeout or self.timeout, **kwargs
+        )
+        self._count('requests')
+
+        if response.status_code == 304 and cached is not None:
+            self._count('not_modified')
+            self.cache.touch(key)
+            return _cached_response(cached, response)
+
+        response.from_cache = False
+        if key and response.status_code == 200 and (
+            response.headers.get('ETag') or response.headers.get('Last-Modified')
+        ):
+            try:
+                self.cache.put(key, response)
+                self._count('stored')
+            except sqlite3.Error as exc:
+                logger.warning("Falha ao gravar resposta no cache HTTP: %s", exc)
+        return response
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def close(self):
+        self.session.close()
+
+
+def _cache_key(url, params):
+    prepared = requests.Request('GET', url, params=params).prepare()
+    return hashlib.sha256(prepared.url.encode()).hexdigest()
+
+
+def _cached_response(cached, revalidation):
+    # Resposta montada a partir do cache, com os dados da revalidação (URL, requisição)
+    response = requests.Response()
+    response.status_code = cached['status']
+    response.headers = CaseInsensitiveDict(cached['headers'])
+    response._content = cached['content']
+    response.url = revalidation.url
+    response.request = revalidation.request
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.elapsed = revalidation.elapsed
+    response.from_cache = True
+    return response
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client():
+    """Cliente único do processo, criado no primeiro uso"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HTTPClient()
+        return _shared_client
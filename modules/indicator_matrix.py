@@ -0,0 +1,181 @@
+"""
+Motor de Indicadores Vetorizado sobre Matriz de Preços (candles × tickers)
+"""
+
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def build_price_matrix(frames, fields=PRICE_FIELDS):
+    """
+    Monta uma matriz por campo com um ticker por coluna.
+
+    As séries são alinhadas pelo último candle (a última linha é o candle mais
+    recente de cada ticker) e completadas com NaN no início. Assim cada coluna
+    contém exatamente o histórico do ticker, sem lacunas de feriados de outras
+    bolsas, e os indicadores ficam idênticos ao cálculo individual.
+    """
+    tickers = list(frames)
+    length = max((len(df) for df in frames.values()), default=0)
+    matrices = {}
+    for field in fields:
+        values = np.full((length, len(tickers)), np.nan)
+        for j, ticker in enumerate(tickers):
+            df = frames[ticker]
+            if field in df.columns and len(df):
+                values[length - len(df):, j] = df[field].to_numpy(dtype=float)
+        matrices[field] = pd.DataFrame(values, columns=tickers)
+    return matrices
+
+
+def sma(close, window):
+    return close.rolling(window=window, min_periods=window).mean()
+
+
+def ema(close, span):
+    return close.ewm(span=span, min_periods=span, adjust=False).mean()
+
+
+def wilder(series, window):
+    """Suavização de Wilder (média exponencial com alpha = 1/n)"""
+    return series.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+
+
+def rsi(close, window=14):
+    # Ganhos/perdas de Wilder; o preenchimento inicial (NaN) fica fora da média
+    valid = close.notna()
+    diff = close.diff(1)
+    up = diff.where(diff > 0, 0.0).where(valid)
+    down = (-diff.where(diff < 0, 0.0)).where(valid)
+    emaup = wilder(up, window)
+    emadn = wilder(down, window)
+    relative_strength = emaup / emadn
+    return (100 - (100 / (1 + relative_strength))).where(emadn != 0, 100.0)
+
+
+def macd(close, fast=12, slow=26):
+    return ema(close, fast) - ema(close, slow)
+
+
+class IndicatorMatrixEngine:
+    """
+    Calcula o conjunto completo de indicadores em uma única passada, tanto
+    para um ticker (Series) quanto para todo o universo (matriz candles ×
+    tickers), coluna a coluna em código compilado (pandas/NumPy).
+
+    Resultados intermediários (médias, EMAs, true range, janelas móveis de
+    máximas/mínimas) são calculados uma vez e compartilhados entre os
+    indicadores que dependem deles.
+    """
+
+    def __init__(self, sma_windows=(20, 50, 200), ema_spans=(12, 26), macd_signal=9,
+                 rsi_window=14, bollinger_window=20, bollinger_std=2,
+                 stochastic_window=14, stochastic_smooth=3, atr_window=14,
+                 adx_window=14, sr_window=20):
+        self.sma_windows = tuple(sma_windows)
+        self.ema_spans = tuple(ema_spans)
+        self.macd_signal = macd_signal
+        self.rsi_window = rsi_window
+        self.bollinger_window = bollinger_window
+        self.bollinger_std = bollinger_std
+        self.stochastic_window = stochastic_window
+        self.stochastic_smooth = stochastic_smooth
+        self.atr_window = atr_window
+        self.adx_window = adx_window
+        self.sr_window = sr_window
+
+    @property
+    def params(self):
+        """Parâmetros em forma hashable (para chaves de cache)"""
+        return tuple(sorted(vars(self).items()))
+
+    def calculate(self, data):
+        """`data` é um DataFrame OHLCV de um ticker ou um dict de matrizes por campo"""
+        close, high, low = data['Close'], data['High'], data['Low']
+        valid = close.notna()
+        indicators = {}
+
+        # Médias móveis
+        rolling_means = {}
+        for window in set(self.sma_windows) | {self.bollinger_window}:
+            rolling_means[window] = sma(close, window)
+        for window in self.sma_windows:
+            indicators[f'SMA_{window}'] = rolling_means[window]
+
+        emas = {span: ema(close, span) for span in self.ema_spans}
+        for span in self.ema_spans:
+            indicators[f'EMA_{span}'] = emas[span]
+
+        # MACD reaproveita as EMAs rápida e lenta
+        fast, slow = self.ema_spans[0], self.ema_spans[-1]
+        macd_line = emas[fast] - emas[slow]
+        macd_signal = ema(macd_line, self.macd_signal)
+        indicators['MACD'] = macd_line
+        indicators['MACD_signal'] = macd_signal
+        indicators['MACD_hist'] = macd_line - macd_signal
+
+        indicators['RSI'] = rsi(close, self.rsi_window)
+
+        # Bandas de Bollinger sobre a média já calculada
+        middle = rolling_means[self.bollinger_window]
+        std = close.rolling(window=self.bollinger_window, min_periods=self.bollinger_window).std(ddof=0)
+        indicators['BB_middle'] = middle
+        indicators['BB_upper'] = middle + self.bollinger_std * std
+        indicators['BB_lower'] = middle - self.bollinger_std * std
+
+        # Janelas de máximas/mínimas compartilhadas (estocástico e suporte/resistência)
+        rolling_high, rolling_low = {}, {}
+        for window in {self.stochastic_window, self.sr_window}:
+            rolling_high[window] = high.rolling(window=window, min_periods=window).max()
+            rolling_low[window] = low.rolling(window=window, min_periods=window).min()
+
+        highest = rolling_high[self.stochastic_window]
+        lowest = rolling_low[self.stochastic_window]
+        price_range = highest - lowest
+        stoch_k = (100 * (close - lowest) / price_range).where(price_range != 0)
+        indicators['STOCH_K'] = stoch_k
+        indicators['STOCH_D'] = sma(stoch_k, self.stochastic_smooth)
+
+        indicators['RESISTANCE'] = rolling_high[self.sr_window]
+        indicators['SUPPORT'] = rolling_low[self.sr_window]
+
+        # True range calculado uma vez para ATR e ADX
+        prev_close = close.shift(1)
+        true_range = np.fmax(np.fmax(high - low, (high - prev_close).abs()), (low - prev_close).abs())
+        atr = wilder(true_range, self.atr_window)
+        indicators['ATR'] = atr
+
+        up_move = high.diff(1)
+        down_move = -low.diff(1)
+        plus_dm = up_move.where((up_move > down_move) & (up_move > 0), 0.0).where(valid)
+        minus_dm = down_move.where((down_move > up_move) & (down_move > 0), 0.0).where(valid)
+        atr_adx = atr if self.adx_window == self.atr_window else wilder(true_range, self.adx_window)
+        plus_di = 100 * wilder(plus_dm, self.adx_window) / atr_adx
+        minus_di = 100 * wilder(minus_dm, self.adx_window) / atr_adx
+        di_sum = plus_di + minus_di
+        dx = (100 * (plus_di - minus_di).abs() / di_sum).where(di_sum != 0)
+        indicators['PLUS_DI'] = plus_di
+        indicators['MINUS_DI'] = minus_di
+        indicators['ADX'] = wilder(dx, self.adx_window)
+
+        return indicators
+
+    def split(self, indicators, ticker, index):
+        """Extrai as séries de um ticker, com o índice de datas original"""
+        n = len(index)
+        return {
+            name: pd.Series(matrix[ticker].to_numpy()[len(matrix) - n:], index=index, name=name)
+            for name, matrix in indicators.items()
+        }
+
+    def calculate_for_frames(self, frames):
+        """Indicadores por ticker a partir de {ticker: DataFrame OHLCV}"""
+        if not frames:
+            return {}
+        indicators = self.calculate(build_price_matrix(frames))
+        return {
+            ticker: self.split(indicators, ticker, df.index)
+            for ticker, df in frames.items()
+        }
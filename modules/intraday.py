@@ -0,0 +1,242 @@
+"""
+Monitoramento Intradiário (candles de 1 e 5 minutos em buffers circulares)
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from .price_store import PRICE_COLUMNS
+from .streaming_indicators import StreamingIndicatorSet
+
+# Um pregão da B3 tem pouco mais de 7 horas de negociação contínua
+DEFAULT_CAPACITY = 480
+
+
+class BarRingBuffer:
+    """
+    Últimos `capacity` candles de um ticker em arrays NumPy de tamanho fixo.
+    Ao encher, cada novo candle sobrescreve o mais antigo: a memória não
+    cresce com a duração da sessão.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype='datetime64[ns]')
+        self.values = np.full((capacity, len(PRICE_COLUMNS)), np.nan)
+        self.start = 0
+        self.count = 0
+
+    def append(self, timestamp, bar):
+        """Grava um candle (Open, High, Low, Close, Volume)"""
+        position = (self.start + self.count) % self.capacity
+        if self.count == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.count += 1
+        self.timestamps[position] = np.datetime64(pd.Timestamp(timestamp).asm8, 'ns')
+        self.values[position] = bar
+
+    @property
+    def last_timestamp(self):
+        if not self.count:
+            return None
+        return pd.Timestamp(self.timestamps[(self.start + self.count - 1) % self.capacity])
+
+    @property
+    def last_bar(self):
+        if not self.count:
+            return None
+        return self.values[(self.start + self.count - 1) % self.capacity]
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.values.nbytes
+
+    def to_frame(self):
+        """Cópia ordenada do conteúdo como DataFrame OHLCV"""
+        order = (self.start + np.arange(self.count)) % self.capacity
+        return pd.DataFrame(
+            self.values[order],
+            index=pd.DatetimeIndex(self.timestamps[order], name='Datetime'),
+            columns=PRICE_COLUMNS
+        )
+
+
+class IntradaySeries:
+    """
+    Candles de `minutes` minutos de um ticker, montados a partir dos candles
+    fechados de 1 minuto, com indicadores atualizados a cada candle fechado
+    """
+
+    def __init__(self, minutes=1, capacity=DEFAULT_CAPACITY):
+        self.minutes = minutes
+        self.buffer = BarRingBuffer(capacity)
+        self.indicators = StreamingIndicatorSet()
+        self.forming = None
+
+    def add(self, timestamp, bar):
+        """Incorpora um candle fechado de 1 minuto"""
+        bucket = timestamp.floor(f'{self.minutes}min')
+        if self.forming is not None and self.forming[0] != bucket:
+            self._close()
+        self.forming = _merge(self.forming, bucket, bar)
+        # O candle agregado fecha com o último minuto do intervalo
+        if timestamp + pd.Timedelta(minutes=1) >= bucket + pd.Timedelta(minutes=self.minutes):
+            self._close()
+
+    def _close(self):
+        bucket, bar = self.forming
+        self.buffer.append(bucket, bar)
+        self.indicators.update(bar[3], bar[1], bar[2])
+        self.forming = None
+
+    def current(self, forming_minute=None):
+        """
+        Último estado; `forming_minute` (timestamp, candle) é o minuto ainda
+        em formação, incluído sem alterar o estado acumulado
+        """
+        forming = self.forming
+        if forming_minute is not None:
+            timestamp, bar = forming_minute
+            bucket = timestamp.floor(f'{self.minutes}min')
+            if forming is None or forming[0] == bucket:
+                forming = _merge(forming, bucket, bar)
+
+        if forming is None:
+            if not self.buffer.count:
+                return None
+            timestamp = self.buffer.last_timestamp
+            close = self.buffer.last_bar[3]
+            values = self.indicators.current()
+        else:
+            timestamp, bar = forming
+            close = bar[3]
+            values = self.indicators.peek(bar[3], bar[1], bar[2])
+        return {'timestamp': timestamp, 'close': close, **values}
+
+
+def _merge(forming, bucket, bar):
+    if forming is None:
+        return bucket, tuple(bar)
+    _, (open_, high, low, _close, volume) = forming
+    return bucket, (open_, max(high, bar[1]), min(low, bar[2]), bar[3], volume + bar[4])
+
+
+class YahooIntradayFeed:
+    """Candles de 1 minuto do pregão atual, por consulta periódica ao Yahoo"""
+
+    def __init__(self, technical):
+        self.technical = technical
+
+    def poll(self, tickers):
+        return self.technical.get_intraday_bars(tickers, interval='1m')
+
+
+class ReplayFeed:
+    """
+    Substituto local do feed: reproduz candles de 1 minuto já gravados,
+    `bars_per_poll` por consulta (útil fora do pregão e em demonstrações)
+    """
+
+    def __init__(self, frames, bars_per_poll=1):
+        self.frames = frames
+        self.bars_per_poll = bars_per_poll
+        self.position = 0
+
+    @classmethod
+    def from_csv(cls, directory, bars_per_poll=1):
+        """Um arquivo <ticker>.csv por ativo, com a data/hora na primeira coluna"""
+        frames = {}
+        for name in os.listdir(directory):
+            if name.endswith('.csv'):
+                frames[name[:-4]] = pd.read_csv(
+                    os.path.join(directory, name), index_col=0, parse_dates=True
+                )
+        return cls(frames, bars_per_poll)
+
+    def poll(self, tickers):
+        self.position += self.bars_per_poll
+        # Inclui o candle anterior para que o último da consulta anterior feche
+        start = max(self.position - self.bars_per_poll - 1, 0)
+        return {
+            ticker: self.frames[ticker].iloc[start:self.position]
+            for ticker in tickers if ticker in self.frames
+        }
+
+
+class IntradayMonitor:
+    """
+    Monitoramento intradiário de um conjunto de tickers. A cada consulta ao
+    feed, os minutos já fechados alimentam as séries de cada intervalo e o
+    último minuto (em formação) só entra nos valores exibidos.
+    """
+
+    def __init__(self, feed, tickers, intervals=(1, 5), capacity=DEFAULT_CAPACITY):
+        self.feed = feed
+        self.tickers = list(tickers)
+        self.intervals = tuple(intervals)
+        self.series = {
+            ticker: {minutes: IntradaySeries(minutes, capacity) for minutes in self.intervals}
+            for ticker in self.tickers
+        }
+        self.last_closed = {}
+        self.forming = {}
+        self.last_poll = None
+
+    def poll(self):
+        """Consulta o feed, atualiza buffers e indicadores e retorna o painel"""
+        frames = self.feed.poll(self.tickers) or {}
+        for ticker, df in frames.items():
+            if ticker in self.series and df is not None and len(df):
+                self._ingest(ticker, df)
+        self.last_poll = time.time()
+        return self.snapshot()
+
+    def _ingest(self, ticker, df):
+        df = df[[c for c in PRICE_COLUMNS if c in df.columns]].dropna(subset=['Close'])
+        if df.empty:
+            return
+        index = df.index
+        if getattr(index, 'tz', None) is not None:
+            index = index.tz_localize(None)
+
+        last_closed = self.last_closed.get(ticker)
+        bars = list(zip(index, df.to_numpy(dtype=float)))
+        # O último minuto retornado ainda pode mudar
+        *closed, forming = bars
+        for timestamp, bar in closed:
+            if last_closed is not None and timestamp <= last_closed:
+                continue
+            for series in self.series[ticker].values():
+                series.add(timestamp, bar)
+            last_closed = timestamp
+
+        self.last_closed[ticker] = last_closed
+        if last_closed is None or forming[0] > last_closed:
+            self.forming[ticker] = forming
+        else:
+            self.forming.pop(ticker, None)
+
+    def snapshot(self):
+        """Último estado de cada ticker/intervalo (preço e indicadores)"""
+        rows = []
+        for ticker in self.tickers:
+            row = {'ticker': ticker}
+            for minutes, series in self.series[ticker].items():
+                state = series.current(self.forming.get(ticker))
+                if state is None:
+                    continue
+                row.setdefault('timestamp', state['timestamp'])
+                row.setdefault('close', state['close'])
+                row[f'RSI_{minutes}m'] = state['RSI']
+                row[f'SMA_20_{minutes}m'] = state['SMA_20']
+                row[f'MACD_hist_{minutes}m'] = state['MACD_hist']
+            if len(row) > 1:
+                rows.append(row)
+        return pd.DataFrame(rows)
+
+    def frame(self, ticker, minutes=1):
+        """Candles fechados do ticker no intervalo (cópia do buffer)"""
+        return self.series[ticker][minutes].buffer.to_frame()
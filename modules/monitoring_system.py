@@ -2,37 +2,131 @@ from .database import AgroDatabase
 from .technical_analysis import TechnicalAnalysisEngine
 from .fundamental_analysis import FundamentalAnalysisEngine
 from .news_analysis import NewsAnalysisEngine
+from .price_store import PriceStore
+from .fundamentals_cache import FundamentalsCache
+from .rate_limiter import RateLimiter, DailyQuota
+from .brapi_provider import BrapiProvider
+from .data_providers import ProviderRouter, YahooProvider
+from .http_client import get_http_client
+from .intraday import IntradayMonitor, YahooIntradayFeed
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
 from datetime import datetime
-import time
+
+logger = logging.getLogger(__name__)
 
 class AgroMonitoringSystem:
-    def __init__(self, finnhub_key, news_api_key, brapi_token):
+    # Um ano de candles permite calcular a SMA 200
+    analysis_period = '1y'
+    
+    # Pesos do score final e cortes da recomendação (ajustáveis via modules.optimization)
+    score_weights = {'technical': 0.40, 'fundamental': 0.40, 'sentiment': 0.20}
+    strong_buy_threshold = 70
+    buy_threshold = 55
+    
+    def __init__(self, finnhub_key, news_api_key, brapi_token, max_workers=8):
         self.database = AgroDatabase()
-        self.technical = TechnicalAnalysisEngine()
-        self.fundamental = FundamentalAnalysisEngine()
-        self.news = NewsAnalysisEngine(finnhub_key, news_api_key)
+        self.rate_limiter = RateLimiter()
+        self.quota = DailyQuota()
+        self.max_workers = max_workers
+        self.http = get_http_client()
+        
+        # Ações, FIAGROs e ETFs da B3 em lote pela Brapi (quando há token);
+        # o Yahoo atende o restante e assume em caso de falha ou cota esgotada
+        self.brapi = None
+        providers = [YahooProvider(self.rate_limiter)]
+        if brapi_token:
+            self.brapi = BrapiProvider(
+                brapi_token,
+                tickers=self.database.get_tickers(['acoes_br', 'fiagros', 'etfs']),
+                quota=self.quota,
+                session=self.http
+            )
+            providers.append(self.brapi)
+        self.providers = ProviderRouter(providers)
+        
+        self.technical = TechnicalAnalysisEngine(
+            store=PriceStore(), rate_limiter=self.rate_limiter, providers=self.providers
+        )
+        self.fundamental = FundamentalAnalysisEngine(
+            rate_limiter=self.rate_limiter,
+            cache=FundamentalsCache(),
+            providers=self.providers
+        )
+        self.news = NewsAnalysisEngine(
+            finnhub_key,
+            news_api_key,
+            http=self.http,
+            rate_limiter=self.rate_limiter,
+            quota=self.quota,
+            database=self.database
+        )
+        self.intraday = None
+    
+    def get_intraday_monitor(self, feed=None):
+        """
+        Monitor intradiário das ações agro da B3 (criado uma vez e mantido
+        entre as atualizações do painel); `feed` substitui o Yahoo, por
+        exemplo por um ReplayFeed local
+        """
+        if self.intraday is None or (feed is not None and feed is not self.intraday.feed):
+            tickers = list(self.database.data['acoes_br'])
+            self.intraday = IntradayMonitor(feed or YahooIntradayFeed(self.technical), tickers)
+        return self.intraday
     
-    def analyze_asset(self, ticker):
+    def analyze_asset(self, ticker, df=None, fundamentals=None, indicators=None):
         ticker_info = self.database.get_ticker_info(ticker)
         if not ticker_info:
             return None
         
-        ticker_display = ticker_info.get('ticker_display', ticker)
+        # Análise Técnica (usa o histórico pré-carregado em lote, se houver)
+        if df is None:
+            df = self.technical.get_price_data(ticker, period=self.analysis_period)
+        if df is None or len(df) < 50:
+            return None
+        
+        if fundamentals is None:
+            fundamentals = self.fundamental.get_fundamental_data(ticker)
+        news_list = self.news.get_news(ticker)
+        return self._build_analysis(ticker, ticker_info, df, fundamentals, news_list, indicators)
+    
+    async def analyze_asset_async(self, ticker, df=None, fundamentals=None, indicators=None):
+        """Versão assíncrona: preços, fundamentos e notícias são buscados em paralelo"""
+        ticker_info = self.database.get_ticker_info(ticker)
+        if not ticker_info:
+            return None
+        
+        if df is None:
+            price_io = asyncio.to_thread(self.technical.get_price_data, ticker, self.analysis_period)
+        else:
+            price_io = asyncio.sleep(0, result=df)
+        
+        if fundamentals is None:
+            fundamentals_io = asyncio.to_thread(self.fundamental.get_fundamental_data, ticker)
+        else:
+            fundamentals_io = asyncio.sleep(0, result=fundamentals)
         
-        # Análise Técnica
-        df = self.technical.get_price_data(ticker, period='6mo')
+        df, fundamentals, news_list = await asyncio.gather(
+            price_io,
+            fundamentals_io,
+            asyncio.to_thread(self.news.get_news, ticker),
+        )
         if df is None or len(df) < 50:
             return None
         
-        indicators = self.technical.calculate_indicators(df)
-        trend = self.technical.analyze_trend(df, indicators)
-        momentum = self.technical.analyze_momentum(indicators)
-        macd = self.technical.analyze_macd(indicators)
-        support_resistance = self.technical.calculate_support_resistance(df)
-        technical_score = self.technical.generate_technical_score(trend, momentum, macd)
+        return self._build_analysis(ticker, ticker_info, df, fundamentals, news_list, indicators)
+    
+    def _build_analysis(self, ticker, ticker_info, df, fundamentals, news_list, indicators=None):
+        ticker_display = ticker_info.get('ticker_display', ticker)
+        
+        # Análise Técnica (indicadores podem vir do cálculo vetorizado da varredura)
+        technical = self.technical.analyze(ticker, df, indicators)
+        self.technical.publish_frame(ticker, df, technical['indicators'])
+        technical_score = technical['score']
+        multi_timeframe = self.technical.analyze_multi_timeframe(ticker, df, technical['trend'])
         
         # Análise Fundamentalista
-        fundamentals = self.fundamental.get_fundamental_data(ticker)
         valuation = self.fundamental.analyze_valuation(fundamentals)
         profitability = self.fundamental.analyze_profitability(fundamentals)
         growth = self.fundamental.analyze_growth(fundamentals)
@@ -42,22 +136,21 @@ class AgroMonitoringSystem:
         )
         
         # Análise de Notícias
-        news_list = self.news.get_news(ticker)
         sentiment = self.news.analyze_sentiment(news_list)
         catalysts = self.news.detect_catalysts(news_list)
         
         # Score Final
         final_score = (
-            technical_score['score'] * 0.40 +
-            fundamental_score['score'] * 0.40 +
-            ((sentiment['score'] + 100) / 2) * 0.20
+            technical_score['score'] * self.score_weights['technical'] +
+            fundamental_score['score'] * self.score_weights['fundamental'] +
+            ((sentiment['score'] + 100) / 2) * self.score_weights['sentiment']
         )
         
         # Recomendação
-        if final_score >= 70:
+        if final_score >= self.strong_buy_threshold:
             recommendation = "🟢 COMPRA FORTE"
             priority = "ALTA"
-        elif final_score >= 55:
+        elif final_score >= self.buy_threshold:
             recommendation = "🟢 COMPRA"
             priority = "MÉDIA"
         else:
@@ -75,10 +168,13 @@ class AgroMonitoringSystem:
             },
             'technical': {
                 'score': technical_score,
-                'trend': trend,
-                'momentum': momentum,
-                'macd': macd,
-                'support_resistance': support_resistance
+                'trend': technical['trend'],
+                'multi_timeframe': multi_timeframe,
+                'patterns': technical['patterns'],
+                'momentum': technical['momentum'],
+                'macd': technical['macd'],
+                'volatility': technical['volatility'],
+                'support_resistance': technical['support_resistance']
             },
             'fundamental': {
                 'score': fundamental_score,
@@ -91,7 +187,7 @@ class AgroMonitoringSystem:
             'news': {
                 'sentiment': sentiment,
                 'catalysts': catalysts,
-                'recent_news': news_list[:3]
+                'recent_news': news_list
             },
             'recommendation': {
                 'final_score': round(final_score, 1),
@@ -103,18 +199,101 @@ class AgroMonitoringSystem:
             'timestamp': datetime.now().isoformat()
         }
     
-    def scan_all_assets(self, min_score=50):
+    def _refresh_news(self, tickers):
+        # Falha na coleta não interrompe a varredura: as análises usam o que já está gravado
+        try:
+            self.news.refresh(tickers)
+        except Exception as exc:
+            logger.warning("Falha na coleta de notícias: %s", exc)
+    
+    def scan_all_assets(self, min_score=50, max_workers=None):
         all_tickers = self.database.get_all_tickers()
-        results = []
         
-        for ticker in all_tickers:
-            try:
-                analysis = self.analyze_asset(ticker)
-                if analysis and analysis['recommendation']['final_score'] >= min_score:
-                    results.append(analysis)
-                time.sleep(0.5)
-            except:
-                continue
+        # Notícias são coletadas em paralelo à carga de preços e fundamentos
+        with ThreadPoolExecutor(max_workers=1) as news_executor:
+            news_refresh = news_executor.submit(self._refresh_news, all_tickers)
+            
+            # Carrega os preços de todo o universo em uma única requisição
+            price_frames = self.technical.get_price_data_batch(all_tickers, period=self.analysis_period)
+            fundamentals = self.fundamental.get_fundamental_data_batch(all_tickers)
+            indicators = self.technical.calculate_indicators_batch(
+                self.technical.uncached_frames(price_frames)
+            )
+            self.technical.update_levels(price_frames)
+            news_refresh.result()
+        
+        # Análises em paralelo; o ritmo de cada provedor fica a cargo do rate limiter
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            analyses = executor.map(
+                lambda ticker: self._safe_analyze(
+                    ticker,
+                    price_frames.get(ticker),
+                    fundamentals.get(ticker),
+                    indicators.get(ticker)
+                ),
+                all_tickers
+            )
+            results = [
+                analysis for analysis in analyses
+                if analysis and analysis['recommendation']['final_score'] >= min_score
+            ]
+        
+        results.sort(key=lambda x: x['recommendation']['final_score'], reverse=True)
+        return results
+    
+    def provider_metrics(self):
+        """Saúde e latência de cada provedor de dados"""
+        return self.providers.metrics()
+    
+    def http_stats(self):
+        """Requisições HTTP feitas, revalidadas (304) e respostas guardadas em cache"""
+        return dict(self.http.stats)
+    
+    def near_support(self, max_distance_pct=3.0):
+        """Ativos a até `max_distance_pct` do suporte mais próximo (consulta ao índice de níveis)"""
+        return self.technical.support_resistance.near_support(max_distance_pct)
+    
+    def _safe_analyze(self, ticker, df=None, fundamentals=None, indicators=None):
+        try:
+            return self.analyze_asset(
+                ticker, df=df, fundamentals=fundamentals, indicators=indicators
+            )
+        except Exception:
+            logger.warning("Falha ao analisar %s", ticker, exc_info=True)
+            return None
+    
+    async def scan_all_assets_async(self, min_score=50, concurrency=None):
+        """Varredura assíncrona com no máximo `concurrency` ativos em andamento"""
+        all_tickers = self.database.get_all_tickers()
+        # Notícias são coletadas em paralelo à carga de preços e fundamentos
+        price_frames, fundamentals, _ = await asyncio.gather(
+            asyncio.to_thread(self.technical.get_price_data_batch, all_tickers, self.analysis_period),
+            asyncio.to_thread(self.fundamental.get_fundamental_data_batch, all_tickers),
+            asyncio.to_thread(self._refresh_news, all_tickers),
+        )
+        indicators = self.technical.calculate_indicators_batch(
+            self.technical.uncached_frames(price_frames)
+        )
+        self.technical.update_levels(price_frames)
+        semaphore = asyncio.Semaphore(concurrency or self.max_workers)
+        
+        async def run(ticker):
+            async with semaphore:
+                try:
+                    return await self.analyze_asset_async(
+                        ticker,
+                        df=price_frames.get(ticker),
+                        fundamentals=fundamentals.get(ticker),
+                        indicators=indicators.get(ticker)
+                    )
+                except Exception:
+                    logger.warning("Falha ao analisar %s", ticker, exc_info=True)
+                    return None
         
+        analyses = await asyncio.gather(*(run(ticker) for ticker in all_tickers))
+        results = [
+            analysis for analysis in analyses
+            if analysis and analysis['recommendation']['final_score'] >= min_score
+        ]
         results.sort(key=lambda x: x['recommendation']['final_score'], reverse=True)
         return results
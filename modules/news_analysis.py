@@ -1,19 +1,226 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from .data_providers import ProviderError, QuotaExceeded
+from .http_client import get_http_client
+from .news_sources import (
+    EntityMatcher, FinnhubNewsSource, NewsAPISource, NewsBudgetScheduler,
+    build_query_groups, company_terms,
+)
+from .catalysts import CatalystDetector
+from .news_index import NewsIndex
+from .news_store import NewsStore
+from .sentiment import SentimentAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
 class NewsAnalysisEngine:
-    def __init__(self, finnhub_key, news_api_key):
+    def __init__(self, finnhub_key, news_api_key, http=None, store=None, rate_limiter=None,
+                 quota=None, database=None, max_workers=4, refresh_interval=3600, lookback_days=7,
+                 max_group_size=4, retry_backoff=300):
         self.finnhub_key = finnhub_key
         self.news_api_key = news_api_key
-    
-    def get_news(self, ticker):
-        return []
-    
+        self.http = http or get_http_client()
+        self.store = store
+        self.database = database
+        self.max_workers = max_workers
+        # Um ticker só volta a ser consultado em um provedor após `refresh_interval` segundos
+        self.refresh_interval = refresh_interval
+        # Consulta que falhou espera `retry_backoff` segundos (dobrando a cada
+        # nova falha, até `refresh_interval`) antes de ser tentada de novo
+        self.retry_backoff = retry_backoff
+        self.lookback_days = lookback_days
+        self.max_group_size = max_group_size
+        self.matcher = EntityMatcher(database)
+        self.sentiment = SentimentAnalyzer()
+        self.catalysts = CatalystDetector()
+        # Universo usado para montar os grupos e reconhecer os tickers citados
+        self.universe = database.get_all_tickers() if database is not None else []
+        # Consultas em andamento {(provedor, chave): evento}: chamadas
+        # simultâneas esperam a coleta em curso em vez de repeti-la
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        # Provedores com cota esgotada ficam fora até o momento (epoch) indicado
+        self._suspended_until = {}
+
+        # Fontes só existem com chave configurada; a NewsAPI exige a cota diária
+        self.sources = []
+        if finnhub_key:
+            self.sources.append(FinnhubNewsSource(finnhub_key, self.http, rate_limiter=rate_limiter))
+        if news_api_key and quota is not None:
+            self.sources.append(NewsAPISource(news_api_key, self.http))
+        self.budgets = {'newsapi': NewsBudgetScheduler(quota)} if quota is not None else {}
+        if self.sources and self.store is None:
+            self.store = NewsStore()
+        
+        # Índice de busca: carregado do armazenamento e atualizado a cada coleta
+        self.index = NewsIndex()
+        if self.store is not None:
+            self.index.add(self.store.all_articles())
+
+    def refresh(self, tickers):
+        """
+        Consulta os provedores, em paralelo, para os tickers vencidos e grava
+        as notícias novas. Provedores de busca textual recebem uma consulta
+        por grupo setorial, e cada notícia é atribuída aos tickers que cita.
+        Consultas de provedores com cota diária passam pelo orçamento.
+        Consultas já em andamento em outra chamada não são repetidas: a
+        chamada espera que terminem. Consultas que falharam aguardam o
+        backoff, e um provedor sem cota fica de fora até o fim da rodada.
+        Retorna quantas notícias inéditas foram gravadas por esta chamada.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not self.sources or not tickers:
+            return 0
+
+        now = time.time()
+        cutoff = now - self.refresh_interval
+        jobs, waiting = [], []
+        # A seleção e a reserva das consultas acontecem sob a mesma trava,
+        # para que duas chamadas não gastem cota com a mesma consulta
+        with self._in_flight_lock:
+            for source in self.sources:
+                if self._suspended_until.get(source.name, 0) > now:
+                    continue
+                groups = self._query_groups(source, tickers)
+                waiting.extend(
+                    self._in_flight[(source.name, key)] for key in groups
+                    if (source.name, key) in self._in_flight
+                )
+                last_fetched = self.store.last_fetched(source.name, groups)
+                retry_at = self.store.retry_at(source.name, groups)
+                stale = [
+                    key for key in groups
+                    if last_fetched.get(key, 0) < cutoff and retry_at.get(key, 0) <= now
+                    and (source.name, key) not in self._in_flight
+                ]
+                budget = self.budgets.get(source.name)
+                if budget is not None and stale:
+                    stale = budget.select(stale, last_fetched)
+                jobs.extend((source, key, groups[key]) for key in stale)
+            for source, key, _ in jobs:
+                self._in_flight[(source.name, key)] = threading.Event()
+
+        added = 0
+        try:
+            if jobs:
+                added = self._run_jobs(jobs)
+        finally:
+            with self._in_flight_lock:
+                for source, key, _ in jobs:
+                    self._in_flight.pop((source.name, key)).set()
+        for event in waiting:
+            event.wait()
+        return added
+
+    def _run_jobs(self, jobs):
+        since = datetime.now(timezone.utc) - timedelta(days=self.lookback_days)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            fetched = list(executor.map(lambda job: self._fetch(*job, since), jobs))
+
+        added = 0
+        failed = {}
+        for (source, key, members), articles in zip(jobs, fetched):
+            if articles is None:
+                failed.setdefault(source.name, []).append(key)
+                continue
+            for article in articles:
+                article['tickers'] = self._assign_tickers(article, members, source.grouped)
+            articles = [a for a in articles if a['tickers']]
+            added += self.store.add(articles)
+            self.index.add(articles)
+            self.store.mark_fetched(source.name, [key])
+        for name, keys in failed.items():
+            self.store.mark_failed(name, keys, self.retry_backoff, self.refresh_interval)
+        return added
+
+    def _query_groups(self, source, tickers):
+        """Consultas que cobrem `tickers`: {chave da consulta: tickers do grupo}"""
+        if not source.grouped:
+            return {t: [t] for t in tickers if source.supports(t)}
+
+        # Grupos montados sobre o universo inteiro, para que a chave de um
+        # grupo não dependa de quais tickers foram pedidos nesta chamada
+        universe = [t for t in self.universe if source.supports(t)]
+        groups = build_query_groups(universe, self.database, self.max_group_size)
+        wanted = set(tickers)
+        selected = {key: members for key, members in groups.items() if wanted & set(members)}
+        for ticker in tickers:
+            if ticker not in universe and source.supports(ticker):
+                selected[ticker] = [ticker]
+        return selected
+
+    def _assign_tickers(self, article, members, grouped):
+        """
+        Tickers citados na notícia, entre os do universo. Em consultas por
+        ticker, o ticker consultado é sempre incluído; em consultas por
+        grupo, notícias que não citam ninguém são descartadas.
+        """
+        candidates = list(dict.fromkeys(members + self.universe))
+        matched = self.matcher.match(article, candidates)
+        if not grouped:
+            matched = list(dict.fromkeys(members + matched))
+        return matched
+
+    def _fetch(self, source, key, members, since):
+        # Depois de uma cota esgotada, as consultas restantes do provedor não saem
+        if self._suspended_until.get(source.name, 0) > time.time():
+            return None
+        terms = [company_terms(t, self.database.get_ticker_info(t) if self.database else None)
+                 for t in members]
+        try:
+            return source.fetch(members, terms, since)
+        except QuotaExceeded as exc:
+            logger.warning("Cota de %s esgotada; provedor suspenso nesta rodada: %s", source.name, exc)
+            self._suspended_until[source.name] = time.time() + self.refresh_interval
+            return None
+        except ProviderError as exc:
+            logger.warning("%s falhou para %s: %s", source.name, key, exc)
+            return None
+
+    def get_news(self, ticker, limit=20):
+        """Notícias recentes do ticker (atualizadas se a última consulta venceu)"""
+        if not self.sources:
+            return []
+        self.refresh([ticker])
+        since = datetime.now(timezone.utc) - timedelta(days=self.lookback_days)
+        return self.store.get(ticker, since=since.strftime('%Y-%m-%dT%H:%M:%SZ'), limit=limit)
+
+    def search_news(self, query='', tickers=None, sectors=None, days=None, start=None, end=None,
+                    limit=50):
+        """
+        Busca local nas notícias já coletadas (sem consultar provedores).
+        `query` aceita palavras e "frases entre aspas"; `sectors` restringe
+        aos tickers dos setores (combinado com `tickers`, vale a interseção)
+        e `days` define o início do período a partir de agora.
+        """
+        if sectors is not None:
+            sector_tickers = {
+                ticker for sector in sectors
+                for ticker, _ in (self.database.get_by_sector(sector) if self.database else [])
+            }
+            tickers = sector_tickers if tickers is None else sector_tickers & set(tickers)
+        if days is not None:
+            start = datetime.now(timezone.utc) - timedelta(days=days)
+        return self.index.search(query, tickers=tickers, start=start, end=end, limit=limit)
+
     def analyze_sentiment(self, news_list):
-        return {
-            'sentiment': 'NEUTRO',
-            'score': 0,
-            'positive': 0,
-            'negative': 0,
-            'neutral': 0
-        }
-    
+        """Sentimento agregado do ticker (score de -100 a 100)"""
+        return self.sentiment.aggregate(news_list)
+
     def detect_catalysts(self, news_list):
-        return []
+        """Catalisadores encontrados nas notícias, com categoria, termo e posição"""
+        catalysts = []
+        for article in news_list:
+            for tag in self.catalysts.detect(article):
+                catalysts.append({
+                    'article_id': article['id'],
+                    'title': article['title'],
+                    'url': article.get('url'),
+                    **tag
+                })
+        return catalysts
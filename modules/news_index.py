@@ -0,0 +1,127 @@
+"""
+Índice Invertido Local das Notícias (busca por palavras e frases)
+"""
+
+import re
+import threading
+from datetime import timezone
+
+import pandas as pd
+
+from .news_sources import normalize_text
+
+_PHRASE = re.compile(r'"([^"]*)"')
+
+
+def tokenize(text):
+    """Palavras sem acentos e em minúsculas (`geadas` ≠ `geada`, `Geáda` = `geada`)"""
+    return normalize_text(text).split()
+
+
+def parse_query(query):
+    """Cláusulas da busca: cada frase entre aspas e cada palavra solta (todas obrigatórias)"""
+    clauses = [tokenize(phrase) for phrase in _PHRASE.findall(query or '')]
+    clauses += [[token] for token in tokenize(_PHRASE.sub(' ', query or ''))]
+    return [clause for clause in clauses if clause]
+
+
+def _iso(value):
+    # Datas no mesmo formato gravado nas notícias (ISO 8601, UTC)
+    if value is None or isinstance(value, str):
+        return value
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(timezone.utc)
+    return timestamp.tz_convert(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class NewsIndex:
+    """
+    Índice invertido posicional em memória: para cada palavra, as notícias
+    e as posições em que aparece (título e resumo, sem que uma frase possa
+    atravessar de um campo ao outro). Também indexa as notícias por ticker.
+    Notícias novas entram incrementalmente; uma notícia já indexada só
+    ganha os tickers novos.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.postings = {}
+        self.ticker_docs = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, articles):
+        """Indexa notícias normalizadas; retorna quantas eram inéditas no índice"""
+        added = 0
+        with self._lock:
+            for article in articles:
+                doc_id = article['id']
+                tickers = set(article.get('tickers') or [])
+                for ticker in tickers:
+                    self.ticker_docs.setdefault(ticker, set()).add(doc_id)
+                if doc_id in self.docs:
+                    self.docs[doc_id]['tickers'] |= tickers
+                    continue
+
+                self.docs[doc_id] = {**article, 'tickers': tickers}
+                title = tokenize(article['title'])
+                summary = tokenize(article.get('summary'))
+                # O resumo começa uma posição depois do fim do título
+                positions = list(enumerate(title)) + [
+                    (len(title) + 1 + i, token) for i, token in enumerate(summary)
+                ]
+                for position, token in positions:
+                    self.postings.setdefault(token, {}).setdefault(doc_id, []).append(position)
+                added += 1
+        return added
+
+    def _match_clause(self, clause):
+        postings = [self.postings.get(token) for token in clause]
+        if not all(postings):
+            return set()
+        docs = set.intersection(*(set(p) for p in sorted(postings, key=len)))
+        if len(clause) == 1:
+            return docs
+
+        # Frase: as palavras precisam aparecer em posições consecutivas
+        matched = set()
+        for doc_id in docs:
+            following = [set(p[doc_id]) for p in postings[1:]]
+            if any(
+                all(start + offset + 1 in positions for offset, positions in enumerate(following))
+                for start in postings[0][doc_id]
+            ):
+                matched.add(doc_id)
+        return matched
+
+    def search(self, query='', tickers=None, start=None, end=None, limit=50):
+        """
+        Notícias que contêm todas as palavras e frases da busca, filtradas
+        pelos tickers e pelo período, das mais recentes para as mais antigas.
+        Busca vazia lista as notícias que passam nos filtros.
+        """
+        start, end = _iso(start), _iso(end)
+        with self._lock:
+            candidates = None
+            if tickers is not None:
+                candidates = set()
+                for ticker in tickers:
+                    candidates |= self.ticker_docs.get(ticker, set())
+
+            for clause in sorted(parse_query(query), key=len, reverse=True):
+                matched = self._match_clause(clause)
+                candidates = matched if candidates is None else candidates & matched
+                if not candidates:
+                    return []
+
+            docs = self.docs.values() if candidates is None else (self.docs[d] for d in candidates)
+            results = [
+                doc for doc in docs
+                if (start is None or doc['published_at'] >= start)
+                and (end is None or doc['published_at'] <= end)
+            ]
+            results.sort(key=lambda doc: doc['published_at'], reverse=True)
+            return [{**doc, 'tickers': sorted(doc['tickers'])} for doc in results[:limit]]
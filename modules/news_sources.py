@@ -0,0 +1,276 @@
+"""
+Fontes de Notícias (Finnhub e NewsAPI): Coleta, Normalização e Orçamento de Cota
+"""
+
+import hashlib
+import math
+import re
+import threading
+import unicodedata
+from datetime import datetime, timezone
+
+import requests
+
+from .data_providers import ProviderError, QuotaExceeded
+
+FINNHUB_BASE_URL = 'https://finnhub.io/api/v1'
+NEWSAPI_BASE_URL = 'https://newsapi.org/v2'
+
+# Sufixos societários ignorados ao buscar e reconhecer o nome da empresa
+CORPORATE_SUFFIXES = {'company', 'co', 'corp', 'corporation', 'inc', 'sa', 'ltd'}
+
+
+def normalize_text(text):
+    """Minúsculas, sem acentos nem pontuação e com espaços simples"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+def content_hash(title):
+    """
+    Identidade da notícia: o título normalizado. A mesma matéria
+    replicada por vários veículos ou provedores gera o mesmo hash.
+    """
+    return hashlib.sha1(normalize_text(title).encode()).hexdigest()
+
+
+def make_article(provider, title, summary, url, source, published_at):
+    """
+    Notícia no formato comum aos provedores (data em ISO 8601, UTC); os
+    tickers são atribuídos depois, pelo reconhecimento de entidades
+    """
+    title = (title or '').strip()
+    if not title or published_at is None:
+        return None
+    return {
+        'id': content_hash(title),
+        'title': title,
+        'summary': (summary or '').strip(),
+        'url': url,
+        'source': source,
+        'provider': provider,
+        'published_at': published_at.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'tickers': [],
+    }
+
+
+def company_terms(ticker, info):
+    """Nome da empresa sem sufixos societários (termo de busca)"""
+    if not info:
+        return ticker.replace('.SA', '')
+    words = info['name'].replace('&', ' ').split()
+    while len(words) > 1 and normalize_text(words[-1]) in CORPORATE_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def build_query_groups(tickers, database, max_size=4):
+    """
+    Agrupa os tickers por setor para que uma única consulta cubra o grupo.
+    Setores com mais de `max_size` nomes são divididos por subsetor (e,
+    se preciso, em partes); tickers fora da base ficam sozinhos.
+    """
+    sectors = {}
+    for ticker in tickers:
+        info = database.get_ticker_info(ticker) if database is not None else None
+        if info is None:
+            sectors[ticker] = [ticker]
+        else:
+            sectors.setdefault(info['sector'], []).append(ticker)
+
+    groups = {}
+    for sector, members in sectors.items():
+        if len(members) <= max_size:
+            groups[sector] = members
+            continue
+        subsectors = {}
+        for ticker in members:
+            subsectors.setdefault(database.get_ticker_info(ticker)['subsector'], []).append(ticker)
+        for subsector, sub_members in subsectors.items():
+            for i in range(0, len(sub_members), max_size):
+                part = f'#{i // max_size + 1}' if len(sub_members) > max_size else ''
+                groups[f'{sector}/{subsector}{part}'] = sub_members[i:i + max_size]
+    return groups
+
+
+class EntityMatcher:
+    """
+    Atribui cada notícia aos tickers citados no título ou no resumo, pelo
+    nome da empresa (sem sufixos) ou pelo código de negociação da B3, com
+    comparação sem acentos e por palavras inteiras. Códigos americanos
+    curtos (DE, CF, BG) não entram: colidiriam com palavras comuns.
+    """
+
+    def __init__(self, database=None):
+        self.database = database
+        self._aliases = {}
+
+    def aliases(self, ticker):
+        if ticker not in self._aliases:
+            info = self.database.get_ticker_info(ticker) if self.database is not None else None
+            code = ticker.replace('.SA', '')
+            names = {company_terms(ticker, info)}
+            if info:
+                names.add(info['name'])
+            if any(c.isdigit() for c in code):
+                names.add(code)
+            self._aliases[ticker] = {normalize_text(name) for name in names} - {''}
+        return self._aliases[ticker]
+
+    def match(self, article, candidates):
+        text = f" {normalize_text(article['title'] + ' ' + (article.get('summary') or ''))} "
+        return [
+            ticker for ticker in candidates
+            if any(f' {alias} ' in text for alias in self.aliases(ticker))
+        ]
+
+
+class FinnhubNewsSource:
+    """Notícias por empresa (`/company-news`); o plano gratuito cobre ativos dos EUA"""
+
+    name = 'finnhub'
+    grouped = False
+
+    def __init__(self, api_key, http, rate_limiter=None, base_url=FINNHUB_BASE_URL, timeout=15):
+        self.api_key = api_key
+        self.http = http
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def supports(self, ticker):
+        # BDRs são consultados pelo ticker original; B3 e futuros ficam de fora
+        return not ticker.endswith('.SA') and '=' not in ticker
+
+    def fetch(self, tickers, terms, since):
+        """Uma consulta por ticker: o endpoint não aceita vários símbolos"""
+        ticker, = tickers
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(self.name)
+        try:
+            response = self.http.get(
+                f"{self.base_url}/company-news",
+                params={
+                    'symbol': ticker,
+                    'from': since.strftime('%Y-%m-%d'),
+                    'to': datetime.now(timezone.utc).strftime('%Y-%m-%d'),
+                },
+                headers={'X-Finnhub-Token': self.api_key},
+                timeout=self.timeout
+            )
+            if response.status_code == 429:
+                raise QuotaExceeded("Limite de requisições do Finnhub atingido")
+            response.raise_for_status()
+            items = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise ProviderError(f"Finnhub: {exc}") from exc
+
+        articles = []
+        for item in items if isinstance(items, list) else []:
+            published = item.get('datetime')
+            articles.append(make_article(
+                self.name,
+                item.get('headline'), item.get('summary'), item.get('url'), item.get('source'),
+                datetime.fromtimestamp(published, timezone.utc) if published else None
+            ))
+        return [a for a in articles if a is not None]
+
+
+class NewsAPISource:
+    """
+    Busca textual (`/everything`) pelos nomes das empresas de um grupo
+    (`"A" OR "B" OR ...`): cada consulta gasta uma requisição da cota diária
+    """
+
+    name = 'newsapi'
+    grouped = True
+
+    def __init__(self, api_key, http, base_url=NEWSAPI_BASE_URL, page_size=50, timeout=15):
+        self.api_key = api_key
+        self.http = http
+        self.base_url = base_url.rstrip('/')
+        self.page_size = page_size
+        self.timeout = timeout
+
+    def supports(self, ticker):
+        # Contratos futuros não têm empresa a buscar
+        return '=' not in ticker
+
+    def fetch(self, tickers, terms, since):
+        try:
+            response = self.http.get(
+                f"{self.base_url}/everything",
+                params={
+                    'q': ' OR '.join(f'"{term}"' for term in terms),
+                    'searchIn': 'title,description',
+                    'from': since.strftime('%Y-%m-%d'),
+                    'sortBy': 'publishedAt',
+                    'pageSize': self.page_size,
+                },
+                headers={'X-Api-Key': self.api_key},
+                timeout=self.timeout
+            )
+            payload = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise ProviderError(f"NewsAPI: {exc}") from exc
+
+        if payload.get('status') != 'ok':
+            message = f"NewsAPI: {payload.get('code')} - {payload.get('message')}"
+            if payload.get('code') == 'rateLimited':
+                raise QuotaExceeded(message)
+            raise ProviderError(message)
+
+        articles = []
+        for item in payload.get('articles') or []:
+            published = item.get('publishedAt')
+            articles.append(make_article(
+                self.name,
+                item.get('title'), item.get('description'), item.get('url'),
+                (item.get('source') or {}).get('name'),
+                datetime.fromisoformat(published.replace('Z', '+00:00')) if published else None
+            ))
+        return [a for a in articles if a is not None]
+
+
+class NewsBudgetScheduler:
+    """
+    Distribui a cota diária de um provedor ao longo do dia e do universo.
+    O gasto acumulado acompanha a fração do dia já decorrida (mais uma
+    folga `burst`), e a cada rodada vão primeiro os tickers consultados
+    há mais tempo: a cota não se esgota nos primeiros ativos da lista.
+    """
+
+    def __init__(self, quota, provider='newsapi', burst=10):
+        self.quota = quota
+        self.provider = provider
+        self.burst = burst
+        self._lock = threading.Lock()
+
+    def allowance(self, now=None):
+        """Requisições liberadas agora (None = provedor sem cota)"""
+        limit = self.quota.limits.get(self.provider)
+        if limit is None:
+            return None
+        now = now or datetime.now(timezone.utc)
+        elapsed = (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
+        paced = min(limit, self.burst + math.floor(limit * elapsed / 86400))
+        return max(paced - self.quota.used(self.provider), 0)
+
+    def select(self, keys, last_fetched):
+        """
+        Reserva cota para as consultas da vez (tickers ou grupos), das
+        consultadas há mais tempo para as mais recentes
+        """
+        with self._lock:
+            allowance = self.allowance()
+            ordered = sorted(keys, key=lambda k: last_fetched.get(k) or 0)
+            if allowance is not None:
+                ordered = ordered[:allowance]
+
+            selected = []
+            for key in ordered:
+                if not self.quota.try_consume(self.provider):
+                    break
+                selected.append(key)
+            return selected
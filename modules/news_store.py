@@ -0,0 +1,199 @@
+"""
+Armazenamento Local de Notícias (deduplicadas por hash de conteúdo)
+"""
+
+import os
+import sqlite3
+import time
+
+DEFAULT_DB_PATH = os.path.join('data', 'news.db')
+
+
+class NewsStore:
+    """
+    Notícias normalizadas em SQLite. Cada notícia é gravada uma única vez
+    (chave = hash do conteúdo) e associada a todos os tickers em que
+    apareceu, venha de qual provedor vier. Também registra quando cada
+    consulta (ticker ou grupo de tickers) foi feita em cada provedor e,
+    para as que falharam, quando podem ser tentadas de novo.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._initialize_schema()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _initialize_schema(self):
+        """Cria as tabelas do armazenamento, se necessário"""
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    summary TEXT,
+                    url TEXT,
+                    source TEXT,
+                    provider TEXT NOT NULL,
+                    published_at TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS article_tickers (
+                    article_id TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    PRIMARY KEY (article_id, ticker)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_article_tickers_ticker ON article_tickers (ticker)"
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS query_log (
+                    provider TEXT NOT NULL,
+                    query_key TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (provider, query_key)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS query_failures (
+                    provider TEXT NOT NULL,
+                    query_key TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    retry_at REAL NOT NULL,
+                    PRIMARY KEY (provider, query_key)
+                )
+            """)
+
+    def add(self, articles):
+        """
+        Grava notícias normalizadas; duplicatas só ganham os novos tickers.
+        Retorna quantas notícias eram inéditas.
+        """
+        now = time.time()
+        added = 0
+        with self._connect() as conn:
+            for article in articles:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO articles "
+                    "(id, title, summary, url, source, provider, published_at, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        article['id'], article['title'], article.get('summary'),
+                        article.get('url'), article.get('source'), article['provider'],
+                        article['published_at'], now,
+                    )
+                )
+                added += cursor.rowcount
+                conn.executemany(
+                    "INSERT OR IGNORE INTO article_tickers (article_id, ticker) VALUES (?, ?)",
+                    [(article['id'], ticker) for ticker in article.get('tickers', [])]
+                )
+        return added
+
+    def get(self, ticker, since=None, limit=50):
+        """Notícias do ticker, das mais recentes para as mais antigas"""
+        query = (
+            "SELECT a.id, a.title, a.summary, a.url, a.source, a.provider, a.published_at "
+            "FROM articles a JOIN article_tickers t ON t.article_id = a.id "
+            "WHERE t.ticker = ?"
+        )
+        params = [ticker]
+        if since is not None:
+            query += " AND a.published_at >= ?"
+            params.append(since)
+        query += " ORDER BY a.published_at DESC LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        columns = ['id', 'title', 'summary', 'url', 'source', 'provider', 'published_at']
+        return [dict(zip(columns, row)) for row in rows]
+
+    def all_articles(self, since=None):
+        """Todas as notícias gravadas, com a lista de tickers de cada uma"""
+        query = (
+            "SELECT a.id, a.title, a.summary, a.url, a.source, a.provider, a.published_at, "
+            "GROUP_CONCAT(t.ticker) "
+            "FROM articles a JOIN article_tickers t ON t.article_id = a.id"
+        )
+        params = []
+        if since is not None:
+            query += " WHERE a.published_at >= ?"
+            params.append(since)
+        query += " GROUP BY a.id"
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        columns = ['id', 'title', 'summary', 'url', 'source', 'provider', 'published_at']
+        return [
+            {**dict(zip(columns, row[:-1])), 'tickers': row[-1].split(',')}
+            for row in rows
+        ]
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def last_fetched(self, provider, keys):
+        """Momento (epoch) da última execução de cada consulta no provedor"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT query_key, fetched_at FROM query_log "
+                f"WHERE provider = ? AND query_key IN ({placeholders})",
+                [provider] + keys
+            ).fetchall()
+        return dict(rows)
+
+    def mark_fetched(self, provider, keys):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO query_log (provider, query_key, fetched_at) VALUES (?, ?, ?)",
+                [(provider, key, now) for key in keys]
+            )
+            conn.executemany(
+                "DELETE FROM query_failures WHERE provider = ? AND query_key = ?",
+                [(provider, key) for key in keys]
+            )
+
+    def retry_at(self, provider, keys):
+        """Momento (epoch) a partir do qual cada consulta que falhou pode ser repetida"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT query_key, retry_at FROM query_failures "
+                f"WHERE provider = ? AND query_key IN ({placeholders})",
+                [provider] + keys
+            ).fetchall()
+        return dict(rows)
+
+    def mark_failed(self, provider, keys, backoff, max_backoff):
+        """Registra a falha; a espera dobra a cada falha seguida, até `max_backoff` segundos"""
+        now = time.time()
+        with self._connect() as conn:
+            for key in keys:
+                row = conn.execute(
+                    "SELECT attempts FROM query_failures WHERE provider = ? AND query_key = ?",
+                    (provider, key)
+                ).fetchone()
+                attempts = (row[0] if row else 0) + 1
+                delay = min(backoff * 2 ** (attempts - 1), max_backoff)
+                conn.execute(
+                    "INSERT OR REPLACE INTO query_failures (provider, query_key, attempts, retry_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (provider, key, attempts, now + delay)
+                )
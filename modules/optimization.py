@@ -0,0 +1,297 @@
+"""
+Busca de Parâmetros do Score (grade e aleatória) em Paralelo
+"""
+
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .backtesting import max_drawdown, non_overlapping, portfolio_equity
+
+
+DEFAULT_COMPONENTS_PATH = os.path.join('data', 'score_components.npz')
+DEFAULT_RESULTS_DIR = os.path.join('data', 'sweeps')
+
+# Entrada do .npz com a assinatura dos dados usados para montar os componentes
+SIGNATURE_KEY = '_signature'
+# Versão do formato dos componentes (arquivos de outra versão são remontados)
+COMPONENTS_FORMAT = 2
+
+# Espaço padrão: peso técnico, corte de compra e limites do RSI. Os pesos são
+# absolutos, como no score do app: o sentimento não tem histórico e fica com o
+# peso do app (variá-lo só deslocaria o corte de compra), e o fundamentalista
+# completa a soma 1
+DEFAULT_GRID = {
+    'w_technical': [0.2, 0.3, 0.4, 0.5, 0.6],
+    'buy_threshold': [50, 55, 60, 65],
+    'rsi_oversold': [20, 25, 30, 35],
+    'rsi_overbought': [65, 70, 75, 80],
+}
+
+
+class ParameterSweep:
+    """
+    Avalia milhares de combinações de pesos e limites sobre componentes de
+    score pré-calculados (tendência, MACD, padrões de candle, RSI, score
+    fundamentalista e resultado da saída stop/alvo/prazo de cada candle),
+    distribuindo o trabalho entre todos os núcleos. Usa apenas dados já
+    armazenados.
+
+    Os fundamentos entram com o valor atual do cache e o sentimento como
+    neutro, pois não há histórico deles por data.
+    """
+
+    def __init__(self, backtest, fundamental=None, components_path=DEFAULT_COMPONENTS_PATH,
+                 results_dir=DEFAULT_RESULTS_DIR, min_trades=30):
+        self.backtest = backtest
+        self.fundamental = fundamental
+        self.components_path = components_path
+        self.results_dir = results_dir
+        self.min_trades = min_trades
+
+    def build_components(self, tickers=None, refresh=False):
+        """
+        Monta (ou carrega do disco) os componentes de score de todo o
+        histórico. O arquivo só é reaproveitado se foi montado com os mesmos
+        tickers, o mesmo histórico armazenado e as mesmas regras de saída
+        """
+        tickers = list(tickers) if tickers is not None else self.backtest.database.get_all_tickers()
+        signature = self._signature(tickers)
+        if not refresh and self.components_path and os.path.exists(self.components_path):
+            with np.load(self.components_path) as data:
+                if SIGNATURE_KEY in data.files and str(data[SIGNATURE_KEY]) == signature:
+                    return {name: data[name] for name in data.files if name != SIGNATURE_KEY}
+
+        technical = self.backtest.technical
+        frames = self.backtest.load_history(tickers, offline=True)
+        indicators = technical.calculate_indicators_batch(frames)
+
+        parts = []
+        for code, (ticker, ticker_indicators) in enumerate(indicators.items()):
+            df = frames[ticker]
+            series = technical.score_series(df, ticker_indicators)
+            returns, _, held = self.backtest.simulate_exits(df)
+            valid = ~np.isnan(returns)
+            bars = np.flatnonzero(valid)
+            dates = df.index.values.astype('datetime64[ns]').astype(np.int64)
+            parts.append(pd.DataFrame({
+                'ticker': code,
+                'bar': bars,
+                'held': held[valid],
+                'date': dates[bars],
+                'exit_date': dates[bars + held[valid]],
+                'trend': series['trend'].to_numpy()[valid],
+                'macd': series['macd'].to_numpy()[valid],
+                'pattern': series['pattern'].to_numpy()[valid],
+                'rsi': series['rsi'].to_numpy()[valid],
+                'fundamental': self._fundamental_score(ticker),
+                'return': returns[valid],
+            }))
+
+        if not parts:
+            raise ValueError("Nenhum histórico armazenado para montar os componentes")
+
+        # Ordem por ticker e candle, como pede a seleção de entradas sem sobreposição
+        table = pd.concat(parts, ignore_index=True)
+        components = {name: table[name].to_numpy() for name in table.columns}
+        if self.components_path:
+            directory = os.path.dirname(self.components_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            np.savez(self.components_path, **components, **{SIGNATURE_KEY: np.array(signature)})
+        return components
+
+    def _signature(self, tickers):
+        # Sem armazenamento local não há como detectar mudanças no histórico
+        store = self.backtest.technical.store
+        backtest = self.backtest
+        return json.dumps({
+            'tickers': sorted(set(tickers)),
+            'history': store.fingerprint(tickers) if store is not None else None,
+            'exits': [backtest.stop_pct, backtest.target_pct, backtest.horizon],
+            'format': COMPONENTS_FORMAT,
+        })
+
+    def _fundamental_score(self, ticker):
+        engine = self.fundamental
+        if engine is None:
+            return 50.0
+        fundamentals = engine.cache.peek(ticker) if engine.cache is not None else None
+        score = engine.generate_fundamental_score(
+            engine.analyze_valuation(fundamentals),
+            engine.analyze_profitability(fundamentals),
+            engine.analyze_growth(fundamentals),
+            engine.analyze_financial_health(fundamentals),
+        )
+        return score['score']
+
+    def grid(self, space=None):
+        """Todas as combinações de uma grade {parâmetro: [valores]}"""
+        space = DEFAULT_GRID if space is None else space
+        names = list(space)
+        return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+    def random(self, n, space=None, seed=None):
+        """`n` combinações sorteadas de uma grade {parâmetro: [valores] ou (mín, máx)}"""
+        space = DEFAULT_GRID if space is None else space
+        rng = np.random.default_rng(seed)
+        combos = []
+        for _ in range(n):
+            params = {}
+            for name, values in space.items():
+                if isinstance(values, tuple):
+                    params[name] = float(rng.uniform(*values))
+                else:
+                    params[name] = values[rng.integers(len(values))]
+            combos.append(params)
+        return combos
+
+    def run(self, combos, components=None, processes=None, chunksize=64, output=True):
+        """Avalia as combinações em um pool de processos e grava a tabela ranqueada"""
+        components = components if components is not None else self.build_components()
+
+        with ProcessPoolExecutor(
+            max_workers=processes or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(components, self.min_trades),
+        ) as executor:
+            metrics = list(executor.map(_evaluate_worker, combos, chunksize=chunksize))
+
+        results = pd.DataFrame([
+            {**params, **score_weights(params), **m} for params, m in zip(combos, metrics)
+        ])
+        results = results.sort_values(
+            ['eligible', 'expectancy_pct', 'trades'], ascending=[False, False, False]
+        ).reset_index(drop=True)
+        results.index += 1
+
+        if output:
+            os.makedirs(self.results_dir, exist_ok=True)
+            path = os.path.join(self.results_dir, f'sweep_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
+            results.to_csv(path, index_label='rank')
+            results.attrs['path'] = path
+        return results
+
+
+def score_weights(params):
+    """
+    Pesos absolutos do score final, como no app (padrão: os do app); sem
+    `w_fundamental`, o fundamentalista completa a soma 1
+    """
+    w_technical = params.get('w_technical', 0.40)
+    w_sentiment = params.get('w_sentiment', 0.20)
+    return {
+        'w_technical': w_technical,
+        'w_fundamental': params.get('w_fundamental', round(1 - w_technical - w_sentiment, 10)),
+        'w_sentiment': w_sentiment,
+    }
+
+
+def evaluate(params, components, min_trades=30):
+    """Métricas da estratégia para uma combinação de parâmetros"""
+    rsi = components['rsi']
+    momentum = np.where(
+        rsi < params.get('rsi_oversold', 30), 3,
+        np.where(rsi > params.get('rsi_overbought', 70), -3, 0)
+    )
+    # Componentes gravados antes dos padrões de candle entram com padrão neutro
+    pattern = components.get('pattern', 0)
+    technical = (components['trend'] + momentum + components['macd'] + pattern + 9) / 18 * 100
+
+    # Sentimento sem histórico: neutro (50 na escala 0-100)
+    weights = score_weights(params)
+    final = (
+        weights['w_technical'] * technical
+        + weights['w_fundamental'] * components['fundamental']
+        + weights['w_sentiment'] * 50
+    )
+    signals = np.flatnonzero(final >= params.get('buy_threshold', 55))
+    taken = signals[non_overlapping(
+        components['bar'][signals], components['held'][signals], components['ticker'][signals]
+    )]
+    returns = components['return'][taken]
+
+    trades = len(returns)
+    if trades == 0:
+        return {'trades': 0, 'hit_rate': 0.0, 'expectancy_pct': 0.0,
+                'total_return_pct': 0.0, 'max_drawdown_pct': 0.0, 'eligible': False}
+
+    # Carteira com o capital dividido entre todos os tickers dos componentes
+    equity = portfolio_equity(pd.DataFrame({
+        'exit_date': components['exit_date'][taken],
+        'ticker': components['ticker'][taken],
+        'return': returns,
+    }), slots=len(np.unique(components['ticker'])))
+    return {
+        'trades': trades,
+        'hit_rate': float((returns > 0).mean() * 100),
+        'expectancy_pct': float(returns.mean() * 100),
+        'total_return_pct': float((equity.iloc[-1] - 1) * 100),
+        'max_drawdown_pct': max_drawdown(equity) * 100,
+        'eligible': trades >= min_trades,
+    }
+
+
+_worker_components = None
+_worker_min_trades = 30
+
+
+def _init_worker(components, min_trades):
+    global _worker_components, _worker_min_trades
+    _worker_components = components
+    _worker_min_trades = min_trades
+
+
+def _evaluate_worker(params):
+    return evaluate(params, _worker_components, _worker_min_trades)
+
+
+def main(argv=None):
+    """Busca de parâmetros pela linha de comando: `python -m modules.optimization`"""
+    import argparse
+
+    from .backtesting import BacktestEngine
+    from .database import AgroDatabase
+    from .fundamental_analysis import FundamentalAnalysisEngine
+    from .fundamentals_cache import FundamentalsCache
+    from .price_store import PriceStore
+    from .technical_analysis import TechnicalAnalysisEngine
+
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.optimization',
+        description='Busca de pesos e limites do score sobre o histórico armazenado'
+    )
+    parser.add_argument('--random', type=int, metavar='N',
+                        help='avalia N combinações sorteadas (padrão: a grade completa)')
+    parser.add_argument('--seed', type=int, help='semente do sorteio')
+    parser.add_argument('--processes', type=int, help='processos em paralelo (padrão: núcleos da máquina)')
+    parser.add_argument('--min-trades', type=int, default=30, help='operações mínimas para ranquear')
+    parser.add_argument('--refresh', action='store_true', help='remonta os componentes de score')
+    parser.add_argument('--top', type=int, default=20, help='linhas exibidas do ranking')
+    args = parser.parse_args(argv)
+
+    database = AgroDatabase()
+    backtest = BacktestEngine(TechnicalAnalysisEngine(store=PriceStore()), database)
+    sweep = ParameterSweep(
+        backtest, FundamentalAnalysisEngine(cache=FundamentalsCache()), min_trades=args.min_trades
+    )
+    try:
+        components = sweep.build_components(refresh=args.refresh)
+    except ValueError as exc:
+        parser.exit(1, f"{exc}. Rode antes `python -m modules.backtesting` para baixar o histórico.\n")
+
+    combos = sweep.random(args.random, seed=args.seed) if args.random else sweep.grid()
+    results = sweep.run(combos, components=components, processes=args.processes)
+
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        print(results.head(args.top).round(2).to_string())
+    print(f"\n{len(results)} combinações avaliadas; ranking completo em {results.attrs['path']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Armazenamento Local de Histórico de Preços (OHLCV)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import pandas as pd
+
+DEFAULT_DB_PATH = os.path.join('data', 'prices.db')
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class PriceStore:
+    """
+    Histórico diário completo por ticker, persistido em SQLite
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._initialize_schema()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _initialize_schema(self):
+        """Cria as tabelas do armazenamento, se necessário"""
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    ticker TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume REAL,
+                    PRIMARY KEY (ticker, date)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS indicator_state (
+                    ticker TEXT PRIMARY KEY,
+                    last_date TEXT NOT NULL,
+                    state TEXT NOT NULL
+                )
+            """)
+
+    def last_timestamp(self, ticker):
+        """Retorna o timestamp do último candle armazenado (ou None)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(date) FROM bars WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+
+    def fingerprint(self, tickers):
+        """
+        Resumo do histórico armazenado dos tickers (quantidade de candles,
+        último candle e soma dos fechamentos): muda com candles novos e com
+        recargas de ajuste
+        """
+        tickers = sorted(set(tickers))
+        if not tickers:
+            return ''
+        placeholders = ','.join('?' * len(tickers))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT ticker, COUNT(*), MAX(date), SUM(close) FROM bars "
+                f"WHERE ticker IN ({placeholders}) GROUP BY ticker ORDER BY ticker",
+                tickers
+            ).fetchall()
+        return hashlib.sha1(json.dumps(rows).encode()).hexdigest()
+
+    def load(self, ticker, start=None):
+        """Carrega o histórico de um ticker a partir de `start` (inclusive)"""
+        query = "SELECT date, open, high, low, close, volume FROM bars WHERE ticker = ?"
+        params = [ticker]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(_format_timestamp(pd.Timestamp(start)))
+        query += " ORDER BY date"
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        df = pd.DataFrame(rows, columns=['Date'] + PRICE_COLUMNS)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop('Date')), name='Date')
+        return df
+
+    def append(self, ticker, df):
+        """Insere (ou substitui) candles no histórico do ticker"""
+        if df is None or df.empty:
+            return 0
+
+        df = df[[c for c in PRICE_COLUMNS if c in df.columns]].dropna(subset=['Close'])
+        index = df.index
+        if getattr(index, 'tz', None) is not None:
+            index = index.tz_localize(None)
+
+        rows = [
+            (
+                ticker,
+                _format_timestamp(ts),
+                _to_float(row.get('Open')),
+                _to_float(row.get('High')),
+                _to_float(row.get('Low')),
+                _to_float(row.get('Close')),
+                _to_float(row.get('Volume')),
+            )
+            for ts, row in zip(index, df.to_dict('records'))
+        ]
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars (ticker, date, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def replace(self, ticker, df):
+        """Substitui todo o histórico do ticker (e descarta o estado incremental)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM bars WHERE ticker = ?", (ticker,))
+            conn.execute("DELETE FROM indicator_state WHERE ticker = ?", (ticker,))
+        return self.append(ticker, df)
+
+    def load_indicator_state(self, ticker):
+        """Retorna (último candle processado, estado) dos indicadores incrementais"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT last_date, state FROM indicator_state WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        if not row:
+            return None, None
+        return pd.Timestamp(row[0]), json.loads(row[1])
+
+    def save_indicator_state(self, ticker, last_timestamp, state):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO indicator_state (ticker, last_date, state) VALUES (?, ?, ?)",
+                (ticker, _format_timestamp(pd.Timestamp(last_timestamp)), json.dumps(state))
+            )
+
+
+def _format_timestamp(ts):
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _to_float(value):
+    return None if value is None or pd.isna(value) else float(value)
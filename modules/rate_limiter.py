@@ -0,0 +1,153 @@
+"""
+Controle de Taxa de Requisições por Provedor (Token Bucket)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+# Limites por provedor: (capacidade do balde, tokens repostos por segundo)
+DEFAULT_LIMITS = {
+    'yahoo': (5, 2.0),                # sem cota oficial; ~2 req/s evita bloqueios
+    'finnhub': (60, 60 / 60),         # 60 chamadas/minuto
+}
+
+# Cotas diárias contadas por dia (UTC) e persistidas entre execuções
+DEFAULT_QUOTAS = {
+    'brapi': 150,
+    'newsapi': 100,
+}
+DEFAULT_QUOTA_PATH = os.path.join('data', 'quota.db')
+
+
+class TokenBucket:
+    """
+    Balde de tokens seguro para uso entre threads
+    """
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Consome tokens se houver saldo, sem bloquear"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """Aguarda até haver tokens disponíveis (ou até o timeout)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class RateLimiter:
+    """
+    Conjunto de baldes de tokens, um por provedor de dados
+    """
+
+    def __init__(self, limits=None):
+        limits = DEFAULT_LIMITS if limits is None else limits
+        self.buckets = {
+            provider: TokenBucket(capacity, rate)
+            for provider, (capacity, rate) in limits.items()
+        }
+
+    def acquire(self, provider, tokens=1, timeout=None):
+        """Bloqueia até o provedor liberar a requisição (provedores sem limite passam direto)"""
+        bucket = self.buckets.get(provider)
+        return bucket.acquire(tokens, timeout) if bucket else True
+
+    def try_acquire(self, provider, tokens=1):
+        bucket = self.buckets.get(provider)
+        return bucket.try_acquire(tokens) if bucket else True
+
+
+class DailyQuota:
+    """
+    Uso diário por provedor, gravado em SQLite para que reinícios do app
+    não zerem a contagem
+    """
+
+    def __init__(self, path=DEFAULT_QUOTA_PATH, limits=None):
+        self.path = path
+        self.limits = dict(DEFAULT_QUOTAS if limits is None else limits)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS usage (
+                    provider TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    requests INTEGER NOT NULL,
+                    PRIMARY KEY (provider, day)
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _today():
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    def used(self, provider):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT requests FROM usage WHERE provider = ? AND day = ?",
+                (provider, self._today())
+            ).fetchone()
+        return row[0] if row else 0
+
+    def remaining(self, provider):
+        """Requisições ainda disponíveis hoje (None para provedores sem cota)"""
+        limit = self.limits.get(provider)
+        return None if limit is None else max(limit - self.used(provider), 0)
+
+    def try_consume(self, provider, requests=1):
+        """Registra o uso se ainda houver cota no dia; caso contrário, não consome"""
+        limit = self.limits.get(provider)
+        with self._lock:
+            if limit is not None and self.used(provider) + requests > limit:
+                return False
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO usage (provider, day, requests) VALUES (?, ?, ?) "
+                    "ON CONFLICT(provider, day) DO UPDATE SET requests = requests + excluded.requests",
+                    (provider, self._today(), requests)
+                )
+        return True
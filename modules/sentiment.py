@@ -0,0 +1,145 @@
+"""
+Sentimento de Notícias Financeiras por Léxico (português e inglês)
+"""
+
+import math
+import re
+
+from .news_sources import normalize_text
+from .request_cache import LRUCache
+
+# Pesos por termo, já sem acentos; `*` marca prefixo (cobre as flexões)
+LEXICON_PT = {
+    # Positivos
+    'alta': 1.0, 'sobe': 1.0, 'sobem': 1.0, 'subiu': 1.0, 'dispara': 1.5, 'disparou': 1.5,
+    'lucro*': 1.5, 'recorde': 1.5, 'cresc*': 1.0, 'avanc*': 1.0, 'valoriz*': 1.0,
+    'supera*': 1.5, 'superou': 1.5, 'dividendo*': 1.0, 'expans*': 1.0, 'ganho*': 1.0,
+    'otimis*': 1.0, 'recupera': 1.0, 'recuperou': 1.0, 'elev*': 0.5, 'aprova*': 0.5,
+    'melhora*': 1.0, 'forte': 0.5, 'positivo*': 1.0, 'safra recorde': 2.0,
+    'eleva recomendacao': 2.0, 'recomendacao de compra': 1.5,
+    # Negativos
+    'queda': -1.0, 'cai': -1.0, 'caem': -1.0, 'caiu': -1.0, 'despenca*': -1.5, 'despencou': -1.5,
+    'prejuizo*': -1.5, 'perda*': -1.0, 'recua*': -1.0, 'rebaix*': -1.5, 'crise': -1.5,
+    'endivid*': -1.0, 'multa*': -1.0, 'investiga*': -1.0, 'fraude*': -2.0, 'greve*': -1.0,
+    'seca': -1.0, 'geada*': -1.0, 'desvaloriz*': -1.0, 'pessimis*': -1.0, 'piora*': -1.0,
+    'fraco*': -0.5, 'negativo*': -1.0, 'embargo*': -1.5, 'suspend*': -1.0,
+    'recuperacao judicial': -2.5, 'corta recomendacao': -2.0, 'abaixo do esperado': -1.5,
+}
+
+LEXICON_EN = {
+    # Positivos
+    'beat*': 1.5, 'surg*': 1.5, 'gain*': 1.0, 'profit*': 1.0, 'record': 1.0,
+    'growth': 1.0, 'grow*': 1.0, 'upgrade*': 1.5, 'rall*': 1.0, 'strong*': 1.0,
+    'rise*': 1.0, 'rose': 1.0, 'jump*': 1.0, 'outperform*': 1.5, 'soar*': 1.5,
+    'boost*': 1.0, 'expand*': 1.0, 'optimis*': 1.0, 'bullish': 1.5,
+    'raises guidance': 2.0, 'better than expected': 1.5,
+    # Negativos
+    'miss': -1.5, 'misses': -1.5, 'missed': -1.5, 'loss*': -1.5, 'fall*': -1.0,
+    'fell': -1.0, 'drop*': -1.0, 'plung*': -1.5, 'downgrade*': -1.5, 'lawsuit*': -1.5,
+    'fraud*': -2.0, 'weak*': -1.0, 'declin*': -1.0, 'cut': -1.0, 'cuts': -1.0,
+    'layoff*': -1.5, 'recall*': -1.5, 'probe*': -1.0, 'bankrupt*': -2.5, 'strike*': -1.0,
+    'drought*': -1.0, 'slump*': -1.5, 'bearish': -1.5, 'tariff*': -1.0,
+    'lowers guidance': -2.0, 'worse than expected': -1.5,
+}
+
+# Negação nas palavras imediatamente anteriores inverte o sinal do termo
+NEGATIONS = {'nao', 'nem', 'sem', 'nunca', 'jamais', 'not', 'no', 'never', 'without'}
+NEGATION_WINDOW = 3
+
+# Rótulos de cada notícia e do agregado do ticker
+ARTICLE_THRESHOLD = 0.05
+AGGREGATE_THRESHOLD = 15
+
+
+def compile_lexicon(*lexicons):
+    """
+    Une os léxicos em uma única expressão regular (termos mais longos
+    primeiro, para que expressões prevaleçam sobre as palavras isoladas)
+    e devolve também a tabela de pesos para resolver cada ocorrência
+    """
+    exact, prefixes = {}, []
+    for lexicon in lexicons:
+        for term, weight in lexicon.items():
+            if term.endswith('*'):
+                prefixes.append((term[:-1], weight))
+            else:
+                exact[term] = weight
+
+    alternatives = [re.escape(term) for term in exact]
+    alternatives += [re.escape(prefix) + r'[a-z0-9]*' for prefix, _ in prefixes]
+    alternatives.sort(key=len, reverse=True)
+    pattern = re.compile(r'\b(?:' + '|'.join(alternatives) + r')\b')
+    prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+    return pattern, exact, prefixes
+
+
+class SentimentAnalyzer:
+    """
+    Pontua notícias de -1 a 1 pelo léxico compilado, em lote. O resultado de
+    cada notícia fica em cache pelo hash do conteúdo: a mesma notícia,
+    associada a vários tickers ou revista em outra varredura, é pontuada
+    uma única vez.
+    """
+
+    def __init__(self, lexicons=(LEXICON_PT, LEXICON_EN), cache_size=20000, alpha=4.0):
+        self.pattern, self.exact, self.prefixes = compile_lexicon(*lexicons)
+        self.cache = LRUCache(maxsize=cache_size)
+        # Suaviza a soma dos pesos para a faixa -1..1 (quanto maior, mais lenta a saturação)
+        self.alpha = alpha
+
+    def _weight(self, term):
+        if term in self.exact:
+            return self.exact[term]
+        for prefix, weight in self.prefixes:
+            if term.startswith(prefix):
+                return weight
+        return 0.0
+
+    def score_text(self, text):
+        text = normalize_text(text)
+        total = 0.0
+        for match in self.pattern.finditer(text):
+            weight = self._weight(match.group())
+            preceding = text[:match.start()].split()[-NEGATION_WINDOW:]
+            if NEGATIONS.intersection(preceding):
+                weight = -weight
+            total += weight
+        return total / math.sqrt(total * total + self.alpha)
+
+    def score_batch(self, articles):
+        """{id da notícia: pontuação}, pontuando só as que não estão em cache"""
+        scores = {}
+        for article in articles:
+            key = article['id']
+            if key in scores:
+                continue
+            score = self.cache.get(key)
+            if score is None:
+                score = self.score_text(f"{article['title']}. {article.get('summary') or ''}")
+                self.cache.set(key, score)
+            scores[key] = score
+        return scores
+
+    def aggregate(self, articles):
+        """
+        Sentimento do ticker: contagens por rótulo e score de -100 a 100
+        (média das notícias, atenuada quando há poucas)
+        """
+        scores = list(self.score_batch(articles).values())
+        positive = sum(1 for s in scores if s > ARTICLE_THRESHOLD)
+        negative = sum(1 for s in scores if s < -ARTICLE_THRESHOLD)
+        score = 100 * sum(scores) / (len(scores) + 2) if scores else 0
+
+        if score >= AGGREGATE_THRESHOLD:
+            label = 'POSITIVO'
+        elif score <= -AGGREGATE_THRESHOLD:
+            label = 'NEGATIVO'
+        else:
+            label = 'NEUTRO'
+        return {
+            'sentiment': label,
+            'score': round(score, 1),
+            'positive': positive,
+            'negative': negative,
+            'neutral': len(scores) - positive - negative
+        }
@@ -0,0 +1,228 @@
+"""
+Indicadores Incrementais (O(1) por novo candle)
+"""
+
+import copy
+from collections import deque
+
+from .support_resistance import SupportResistanceTracker
+
+
+class StreamingSMA:
+    """Média móvel simples com soma acumulada"""
+
+    def __init__(self, window=20):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+
+    def update(self, value):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        return self.value
+
+    @property
+    def value(self):
+        if len(self.values) < self.window:
+            return None
+        return self.total / self.window
+
+    def to_state(self):
+        return {'window': self.window, 'values': list(self.values)}
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state['window'])
+        for value in state['values']:
+            obj.update(value)
+        return obj
+
+
+class StreamingEMA:
+    """Média móvel exponencial (mesma recursão de ewm(adjust=False))"""
+
+    def __init__(self, span=None, alpha=None, min_periods=None):
+        self.alpha = alpha if alpha is not None else 2 / (span + 1)
+        self.min_periods = min_periods if min_periods is not None else (span or 0)
+        self.span = span
+        self.count = 0
+        self.ema = None
+
+    def update(self, value):
+        if self.ema is None:
+            self.ema = value
+        else:
+            self.ema = (1 - self.alpha) * self.ema + self.alpha * value
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        return self.ema if self.count >= self.min_periods else None
+
+    def to_state(self):
+        return {
+            'alpha': self.alpha,
+            'min_periods': self.min_periods,
+            'span': self.span,
+            'count': self.count,
+            'ema': self.ema,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(span=state['span'], alpha=state['alpha'], min_periods=state['min_periods'])
+        obj.count = state['count']
+        obj.ema = state['ema']
+        return obj
+
+
+class StreamingRSI:
+    """RSI de Wilder com médias de ganhos/perdas suavizadas"""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.prev_close = None
+        self.avg_up = StreamingEMA(alpha=1 / window, min_periods=window)
+        self.avg_down = StreamingEMA(alpha=1 / window, min_periods=window)
+
+    def update(self, close):
+        # O primeiro candle entra com variação zero, como no `ta`
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        self.avg_up.update(max(diff, 0.0))
+        self.avg_down.update(max(-diff, 0.0))
+        return self.value
+
+    @property
+    def value(self):
+        up, down = self.avg_up.value, self.avg_down.value
+        if up is None or down is None:
+            return None
+        if down == 0:
+            return 100.0
+        return 100 - (100 / (1 + up / down))
+
+    def to_state(self):
+        return {
+            'window': self.window,
+            'prev_close': self.prev_close,
+            'avg_up': self.avg_up.to_state(),
+            'avg_down': self.avg_down.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state['window'])
+        obj.prev_close = state['prev_close']
+        obj.avg_up = StreamingEMA.from_state(state['avg_up'])
+        obj.avg_down = StreamingEMA.from_state(state['avg_down'])
+        return obj
+
+
+class StreamingMACD:
+    """MACD (linha, sinal e histograma) a partir de EMAs acumuladas"""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = StreamingEMA(span=fast)
+        self.slow = StreamingEMA(span=slow)
+        self.signal = StreamingEMA(span=signal)
+        self.macd = None
+
+    def update(self, close):
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        if fast is not None and slow is not None:
+            self.macd = fast - slow
+            self.signal.update(self.macd)
+        return self.value
+
+    @property
+    def value(self):
+        signal = self.signal.value
+        return {
+            'macd': self.macd,
+            'signal': signal,
+            'histogram': None if signal is None else self.macd - signal,
+        }
+
+    def to_state(self):
+        return {
+            'fast': self.fast.to_state(),
+            'slow': self.slow.to_state(),
+            'signal': self.signal.to_state(),
+            'macd': self.macd,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls()
+        obj.fast = StreamingEMA.from_state(state['fast'])
+        obj.slow = StreamingEMA.from_state(state['slow'])
+        obj.signal = StreamingEMA.from_state(state['signal'])
+        obj.macd = state['macd']
+        return obj
+
+
+class StreamingIndicatorSet:
+    """
+    Conjunto de indicadores do motor técnico mantido incrementalmente
+    """
+
+    def __init__(self, sma_window=20, rsi_window=14):
+        self.sma = StreamingSMA(sma_window)
+        self.rsi = StreamingRSI(rsi_window)
+        self.macd = StreamingMACD()
+        self.levels = SupportResistanceTracker()
+        self.bars = 0
+
+    def update(self, close, high=None, low=None):
+        """Incorpora um candle fechado e retorna os valores atualizados"""
+        close = float(close)
+        self.sma.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.levels.update(
+            close if high is None else float(high),
+            close if low is None else float(low),
+            close
+        )
+        self.bars += 1
+        return self.current()
+
+    def peek(self, close, high=None, low=None):
+        """Valores considerando um candle ainda em formação, sem alterar o estado"""
+        return copy.deepcopy(self).update(close, high, low)
+
+    def current(self):
+        macd = self.macd.value
+        return {
+            'SMA_20': self.sma.value,
+            'RSI': self.rsi.value,
+            'MACD': macd['macd'],
+            'MACD_signal': macd['signal'],
+            'MACD_hist': macd['histogram'],
+            **self.levels.value,
+        }
+
+    def to_state(self):
+        return {
+            'bars': self.bars,
+            'sma': self.sma.to_state(),
+            'rsi': self.rsi.to_state(),
+            'macd': self.macd.to_state(),
+            'levels': self.levels.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls()
+        obj.bars = state['bars']
+        obj.sma = StreamingSMA.from_state(state['sma'])
+        obj.rsi = StreamingRSI.from_state(state['rsi'])
+        obj.macd = StreamingMACD.from_state(state['macd'])
+        # Estados gravados antes dos níveis começam a acumulá-los a partir daqui
+        if 'levels' in state:
+            obj.levels = SupportResistanceTracker.from_state(state['levels'])
+        return obj
@@ -0,0 +1,284 @@
+"""
+Suportes e Resistências por Pivôs (extremos móveis com deque monotônica)
+"""
+
+from collections import deque
+
+import numpy as np
+
+from .indicator_matrix import build_price_matrix
+
+
+class MonotonicExtrema:
+    """
+    Máxima e mínima de uma janela deslizante em O(1) amortizado por candle.
+
+    Cada deque guarda (posição, valor) em ordem monotônica: valores que nunca
+    mais podem ser o extremo da janela são descartados na inserção.
+    """
+
+    def __init__(self, window=20):
+        self.window = window
+        self.count = 0
+        self._max = deque()
+        self._min = deque()
+
+    def update(self, high, low=None):
+        low = high if low is None else low
+        position = self.count
+        self.count += 1
+
+        while self._max and self._max[-1][1] <= high:
+            self._max.pop()
+        self._max.append((position, high))
+        while self._min and self._min[-1][1] >= low:
+            self._min.pop()
+        self._min.append((position, low))
+
+        # Remove o que saiu da janela
+        oldest = position - self.window
+        while self._max[0][0] <= oldest:
+            self._max.popleft()
+        while self._min[0][0] <= oldest:
+            self._min.popleft()
+        return self.value
+
+    @property
+    def value(self):
+        """(máxima, mínima) da janela, ou (None, None) antes de completá-la"""
+        if self.count < self.window:
+            return None, None
+        return self._max[0][1], self._min[0][1]
+
+    def to_state(self):
+        return {
+            'window': self.window,
+            'count': self.count,
+            'max': [list(item) for item in self._max],
+            'min': [list(item) for item in self._min],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state['window'])
+        obj.count = state['count']
+        obj._max = deque(tuple(item) for item in state['max'])
+        obj._min = deque(tuple(item) for item in state['min'])
+        return obj
+
+
+class LevelBook:
+    """
+    Níveis de preço formados por pivôs próximos (dentro de `tolerance_pct`).
+    Cada novo pivô reforça o nível mais próximo (média dos toques) ou cria
+    um nível novo; acima de `max_levels`, descarta o nível com menos toques
+    e, no empate, o tocado há mais tempo.
+    """
+
+    def __init__(self, tolerance_pct=1.5, max_levels=12):
+        self.tolerance_pct = tolerance_pct
+        self.max_levels = max_levels
+        self.levels = []
+
+    def add(self, price, position):
+        nearest = None
+        for level in self.levels:
+            distance = abs(level['price'] - price) / level['price'] * 100
+            if distance <= self.tolerance_pct and (nearest is None or distance < nearest[0]):
+                nearest = (distance, level)
+
+        if nearest is not None:
+            level = nearest[1]
+            level['price'] = (level['price'] * level['touches'] + price) / (level['touches'] + 1)
+            level['touches'] += 1
+            level['last_position'] = position
+        else:
+            self.levels.append({'price': price, 'touches': 1, 'last_position': position})
+            if len(self.levels) > self.max_levels:
+                weakest = min(self.levels, key=lambda l: (l['touches'], l['last_position']))
+                self.levels.remove(weakest)
+
+    def snapshot(self, current, limit=3):
+        """Suportes (abaixo do preço) e resistências (acima), do mais próximo ao mais distante"""
+        def describe(level):
+            return {
+                'price': level['price'],
+                'touches': level['touches'],
+                'strength': _strength(level['touches']),
+                'distance_pct': abs(current - level['price']) / current * 100,
+            }
+
+        supports = sorted(
+            (l for l in self.levels if l['price'] < current), key=lambda l: -l['price']
+        )
+        resistances = sorted(
+            (l for l in self.levels if l['price'] > current), key=lambda l: l['price']
+        )
+        return {
+            'supports': [describe(l) for l in supports[:limit]],
+            'resistances': [describe(l) for l in resistances[:limit]],
+        }
+
+    def to_state(self):
+        return {
+            'tolerance_pct': self.tolerance_pct,
+            'max_levels': self.max_levels,
+            'levels': [dict(level) for level in self.levels],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state['tolerance_pct'], state['max_levels'])
+        obj.levels = [dict(level) for level in state['levels']]
+        return obj
+
+
+def _strength(touches):
+    if touches >= 3:
+        return 'FORTE'
+    if touches == 2:
+        return 'MODERADO'
+    return 'FRACO'
+
+
+def detect_pivots(high, low, span=5):
+    """
+    Topos e fundos de swing: candles cuja máxima (mínima) é o extremo da
+    janela centrada de 2 * span + 1 candles. Funciona para uma Series ou
+    para a matriz candles × tickers; o rolling do pandas já é O(n) por coluna.
+    """
+    window = 2 * span + 1
+    pivot_high = high == high.rolling(window=window, center=True).max()
+    pivot_low = low == low.rolling(window=window, center=True).min()
+    return pivot_high, pivot_low
+
+
+class SupportResistanceTracker:
+    """
+    Versão incremental: extremos da janela, confirmação de pivôs (após
+    `span` candles) e níveis atualizados candle a candle, com memória fixa
+    """
+
+    def __init__(self, window=20, span=5, tolerance_pct=1.5, max_levels=12):
+        self.span = span
+        self.extrema = MonotonicExtrema(window)
+        self.pivot_window = MonotonicExtrema(2 * span + 1)
+        self.recent = deque(maxlen=2 * span + 1)
+        self.book = LevelBook(tolerance_pct, max_levels)
+        self.last_close = None
+
+    def update(self, high, low, close):
+        position = self.extrema.count
+        self.extrema.update(high, low)
+        window_high, window_low = self.pivot_window.update(high, low)
+        self.recent.append((high, low))
+        self.last_close = close
+
+        # O candle central da janela cheia vira pivô se for o extremo dela
+        if window_high is not None:
+            center_high, center_low = self.recent[self.span]
+            center = position - self.span
+            if center_high == window_high:
+                self.book.add(center_high, center)
+            if center_low == window_low:
+                self.book.add(center_low, center)
+        return self.value
+
+    @property
+    def value(self):
+        resistance, support = self.extrema.value
+        return {'RESISTANCE': resistance, 'SUPPORT': support}
+
+    def snapshot(self, current=None, limit=3):
+        current = self.last_close if current is None else current
+        if current is None:
+            return {'supports': [], 'resistances': []}
+        return self.book.snapshot(current, limit)
+
+    def to_state(self):
+        return {
+            'span': self.span,
+            'extrema': self.extrema.to_state(),
+            'pivot_window': self.pivot_window.to_state(),
+            'recent': [list(bar) for bar in self.recent],
+            'book': self.book.to_state(),
+            'last_close': self.last_close,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(span=state['span'])
+        obj.extrema = MonotonicExtrema.from_state(state['extrema'])
+        obj.pivot_window = MonotonicExtrema.from_state(state['pivot_window'])
+        obj.recent = deque((tuple(bar) for bar in state['recent']), maxlen=2 * obj.span + 1)
+        obj.book = LevelBook.from_state(state['book'])
+        obj.last_close = state['last_close']
+        return obj
+
+
+class SupportResistanceEngine:
+    """
+    Níveis de todo o universo calculados de uma vez sobre a matriz de preços.
+    O último resultado de cada ticker fica indexado, de modo que telas como
+    "perto do suporte" são uma consulta ao índice, sem recálculo.
+    """
+
+    def __init__(self, span=5, tolerance_pct=1.5, max_levels=12, limit=3):
+        self.span = span
+        self.tolerance_pct = tolerance_pct
+        self.max_levels = max_levels
+        self.limit = limit
+        self.snapshots = {}
+
+    def calculate(self, ticker, df):
+        """Níveis de um ticker (reaproveita o índice se os candles não mudaram)"""
+        cached = self.snapshots.get(ticker)
+        if cached is not None and cached['key'] == _frame_key(df):
+            return cached
+        return self.calculate_for_frames({ticker: df})[ticker]
+
+    def calculate_for_frames(self, frames, index=True):
+        """Níveis de {ticker: DataFrame OHLCV} com detecção de pivôs vetorizada"""
+        frames = {t: df for t, df in frames.items() if df is not None and len(df)}
+        if not frames:
+            return {}
+
+        matrices = build_price_matrix(frames, fields=['High', 'Low'])
+        pivot_high, pivot_low = detect_pivots(matrices['High'], matrices['Low'], self.span)
+        length = len(matrices['High'])
+
+        results = {}
+        for ticker, df in frames.items():
+            offset = length - len(df)
+            highs = df['High'].to_numpy(dtype=float)
+            lows = df['Low'].to_numpy(dtype=float)
+            is_high = pivot_high[ticker].to_numpy()[offset:]
+            is_low = pivot_low[ticker].to_numpy()[offset:]
+
+            # Mesma ordem da versão incremental: topo antes do fundo no mesmo candle
+            book = LevelBook(self.tolerance_pct, self.max_levels)
+            for position in np.flatnonzero(is_high | is_low):
+                if is_high[position]:
+                    book.add(float(highs[position]), int(position))
+                if is_low[position]:
+                    book.add(float(lows[position]), int(position))
+
+            current = float(df['Close'].iloc[-1])
+            snapshot = book.snapshot(current, self.limit)
+            snapshot.update({'current': current, 'key': _frame_key(df)})
+            results[ticker] = snapshot
+            if index:
+                self.snapshots[ticker] = snapshot
+        return results
+
+    def near_support(self, max_distance_pct=3.0):
+        """Tickers cujo suporte mais próximo está a até `max_distance_pct` do preço"""
+        matches = {}
+        for ticker, snapshot in list(self.snapshots.items()):
+            if snapshot['supports'] and snapshot['supports'][0]['distance_pct'] <= max_distance_pct:
+                matches[ticker] = snapshot['supports'][0]
+        return matches
+
+
+def _frame_key(df):
+    return (df.index[-1], len(df), float(df['Close'].iloc[-1]))
@@ -1,29 +1,379 @@
-import yfinance as yf
-from ta.trend import SMAIndicator, MACD
-from ta.momentum import RSIIndicator
+import logging
+import re
+import time
+import numpy as np
+import pandas as pd
+from .request_cache import LRUCache, SingleFlight
+from .indicator_matrix import IndicatorMatrixEngine, build_price_matrix
+from .candlestick_patterns import CandlestickPatternEngine, PATTERN_BIAS, PATTERN_LABELS
+from .streaming_indicators import StreamingIndicatorSet
+from .support_resistance import SupportResistanceEngine
+from .data_providers import ProviderRouter, YahooProvider
+
+logger = logging.getLogger(__name__)
+
+
+def _month_end_rule():
+    # 'ME' a partir do pandas 2.2; versões anteriores usam 'M'
+    try:
+        pd.tseries.frequencies.to_offset('ME')
+        return 'ME'
+    except ValueError:
+        return 'M'
+
+
+# Regras de reamostragem a partir dos candles diários
+TIMEFRAME_RULES = {
+    '1wk': 'W-FRI',
+    '1mo': _month_end_rule(),
+}
+
+OHLCV_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+}
+
+# Sincronização incremental: dias de sobreposição com o histórico armazenado e
+# diferença relativa de fechamento que indica novo ajuste (dividendo/desdobramento)
+ADJUSTMENT_OVERLAP_DAYS = 7
+ADJUSTMENT_TOLERANCE = 5e-4
 
 class TechnicalAnalysisEngine:
+    def __init__(self, store=None, history_period='5y', refresh_interval=900, rate_limiter=None,
+                 analysis_cache_size=512, rsi_oversold=30, rsi_overbought=70, providers=None):
+        # Com um PriceStore, o histórico completo fica em disco e apenas os
+        # candles posteriores ao último armazenado são baixados novamente
+        self.store = store
+        self.history_period = history_period
+        self.refresh_interval = refresh_interval
+        self.rate_limiter = rate_limiter
+        # Roteador de provedores (por padrão, só o Yahoo)
+        self.providers = providers or ProviderRouter([YahooProvider(rate_limiter)])
+        self._last_sync = {}
+        # Preços/indicadores já calculados, compartilhados entre sessões
+        self.frames = LRUCache(maxsize=256, ttl=refresh_interval)
+        self._flight = SingleFlight()
+        self.matrix_engine = IndicatorMatrixEngine()
+        self.pattern_engine = CandlestickPatternEngine()
+        # Níveis por pivôs de todo o universo, indexados por ticker
+        self.support_resistance = SupportResistanceEngine()
+        self.rsi_oversold = rsi_oversold
+        self.rsi_overbought = rsi_overbought
+        # Resultado da etapa técnica por (ticker, candles, parâmetros)
+        self.analysis_cache = LRUCache(maxsize=analysis_cache_size)
+        self.timeframe_cache = LRUCache(maxsize=analysis_cache_size)
+    
     def get_price_data(self, ticker, period='6mo'):
+        # Requisições idênticas simultâneas compartilham um único download
+        return self._flight.do(('price', ticker, period), self._get_price_data, ticker, period)
+    
+    def _get_price_data(self, ticker, period):
+        if self.store is None:
+            return self._download(ticker, period=period)
         try:
-            stock = yf.Ticker(ticker)
-            df = stock.history(period=period)
+            self._sync_store([ticker])
+            df = self.store.load(ticker, start=_period_start(period))
             return df if not df.empty else None
-        except:
+        except Exception:
+            logger.warning("Falha ao carregar o histórico de %s", ticker, exc_info=True)
             return None
     
+    def get_price_data_batch(self, tickers, period='6mo'):
+        """Baixa o histórico de vários tickers em uma única requisição agrupada"""
+        tickers = list(tickers)
+        return self._flight.do(
+            ('batch', tuple(tickers), period), self._get_price_data_batch, tickers, period
+        )
+    
+    def _get_price_data_batch(self, tickers, period):
+        if self.store is None:
+            frames = self._download_batch(tickers, period=period)
+        else:
+            frames = {}
+            try:
+                self._sync_store(tickers)
+                start = _period_start(period)
+                for ticker in tickers:
+                    df = self.store.load(ticker, start=start)
+                    if not df.empty:
+                        frames[ticker] = df
+            except Exception:
+                logger.warning("Falha ao carregar o histórico em lote", exc_info=True)
+                frames = {}
+        
+        # Fallback individual para tickers que o lote não trouxe
+        for ticker in tickers:
+            if ticker not in frames:
+                df = self.get_price_data(ticker, period=period)
+                if df is not None:
+                    frames[ticker] = df
+        return frames
+    
+    def get_intraday_bars(self, tickers, interval='1m'):
+        """Candles intradiários do pregão atual (o último pode estar em formação)"""
+        return self.providers.call('intraday', list(tickers), interval=interval)
+    
+    def _download(self, ticker, period=None, start=None):
+        return self._download_batch([ticker], period=period, start=start).get(ticker)
+    
+    def _download_batch(self, tickers, period=None, start=None):
+        # Cada ticker vai ao provedor mais barato disponível, com failover
+        if not tickers:
+            return {}
+        return self.providers.call('history', tickers, period=period, start=start)
+    
+    def _sync_store(self, tickers):
+        """Atualiza o armazenamento local com os candles que ainda faltam"""
+        now = time.time()
+        pending = [
+            t for t in tickers
+            if now - self._last_sync.get(t, 0) >= self.refresh_interval
+        ]
+        if not pending:
+            return
+        
+        last_timestamps = {t: self.store.last_timestamp(t) for t in pending}
+        new_tickers = [t for t, ts in last_timestamps.items() if ts is None]
+        known_tickers = [t for t, ts in last_timestamps.items() if ts is not None]
+        
+        frames = {}
+        if new_tickers:
+            # Primeira carga: histórico completo
+            frames.update(self._download_batch(new_tickers, period=self.history_period))
+        if known_tickers:
+            # Cargas seguintes: a partir de alguns dias antes do último candle
+            # (regravado, pois pode ter sido salvo ainda em formação), para que
+            # haja candles fechados em comum com o armazenamento. Um lote por
+            # data de início: um ticker parado não alarga a janela dos demais
+            windows = {}
+            for ticker in known_tickers:
+                start = last_timestamps[ticker] - pd.Timedelta(days=ADJUSTMENT_OVERLAP_DAYS)
+                windows.setdefault(start.strftime('%Y-%m-%d'), []).append(ticker)
+            for start, window_tickers in windows.items():
+                frames.update(self._download_batch(window_tickers, start=start))
+        
+        # Dividendos e desdobramentos mudam o ajuste de todo o histórico: se os
+        # candles em comum não batem, o histórico armazenado é recarregado inteiro
+        adjusted = [
+            t for t in known_tickers
+            if t in frames and self._adjustment_changed(t, frames[t], last_timestamps[t])
+        ]
+        if adjusted:
+            logger.info("Ajuste de preços alterado; recarregando histórico de %s", ', '.join(adjusted))
+            reloaded = self._download_batch(adjusted, period=self.history_period)
+            for ticker in adjusted:
+                frame = frames.pop(ticker)
+                if ticker in reloaded:
+                    self.store.replace(ticker, reloaded[ticker])
+                    self.update_streaming_indicators(ticker)
+                else:
+                    # Sem o histórico completo, mantém ao menos os candles novos
+                    frames[ticker] = frame
+        
+        for ticker, df in frames.items():
+            self.store.append(ticker, df)
+            self.update_streaming_indicators(ticker)
+        for ticker in pending:
+            if ticker in frames or last_timestamps[ticker] is not None:
+                self._last_sync[ticker] = now
+    
+    def _adjustment_changed(self, ticker, df, last_timestamp):
+        """Compara os fechamentos baixados com os armazenados nos candles fechados em comum"""
+        index = df.index.tz_localize(None) if getattr(df.index, 'tz', None) is not None else df.index
+        downloaded = pd.Series(df['Close'].to_numpy(dtype=float), index=index)
+        stored = self.store.load(ticker, start=index[0])['Close']
+        # O último candle armazenado pode ter sido gravado ainda em formação
+        stored = stored[stored.index < last_timestamp]
+        common = stored.index.intersection(downloaded.index)
+        if common.empty:
+            return False
+        ratio = downloaded[common] / stored[common]
+        return bool(((ratio - 1).abs() > ADJUSTMENT_TOLERANCE).any())
+    
+    def update_streaming_indicators(self, ticker):
+        """
+        Avança o estado incremental dos indicadores com os candles fechados
+        ainda não processados e retorna os valores atuais (incluindo o candle
+        em formação, sem gravá-lo no estado)
+        """
+        if self.store is None:
+            return None
+        try:
+            last_ts, state = self.store.load_indicator_state(ticker)
+            streaming = (
+                StreamingIndicatorSet.from_state(state) if state else StreamingIndicatorSet()
+            )
+            bars = self.store.load(ticker, start=last_ts)
+            if last_ts is not None:
+                bars = bars[bars.index > last_ts]
+            
+            today = pd.Timestamp.now().normalize()
+            closed = bars[bars.index < today]
+            for high, low, close in closed[['High', 'Low', 'Close']].itertuples(index=False):
+                streaming.update(close, high, low)
+            if len(closed):
+                self.store.save_indicator_state(ticker, closed.index[-1], streaming.to_state())
+            
+            forming = bars[bars.index >= today]
+            if len(forming):
+                bar = forming.iloc[-1]
+                return streaming.peek(bar['Close'], bar['High'], bar['Low'])
+            return streaming.current()
+        except Exception:
+            logger.warning("Falha ao atualizar indicadores incrementais de %s", ticker, exc_info=True)
+            return None
+    
+    def resample(self, df, timeframe):
+        """Converte candles diários em semanais ('1wk') ou mensais ('1mo')"""
+        if timeframe == '1d':
+            return df
+        aggregation = {c: a for c, a in OHLCV_AGGREGATION.items() if c in df.columns}
+        resampled = df[list(aggregation)].resample(TIMEFRAME_RULES[timeframe]).agg(aggregation)
+        return resampled.dropna(subset=['Close'])
+    
+    def get_timeframe_data(self, ticker, timeframe, df=None):
+        """
+        Candles do ticker no timeframe pedido, derivados do histórico diário
+        armazenado (sem novas requisições) e mantidos em cache
+        """
+        daily = df
+        if self.store is not None:
+            stored = self.store.load(ticker)
+            if df is None or len(stored) > len(df):
+                daily = stored
+        if daily is None or daily.empty:
+            return None
+        
+        key = (ticker, timeframe, daily.index[0], daily.index[-1], len(daily), float(daily['Close'].iloc[-1]))
+        cached = self.timeframe_cache.get(key)
+        if cached is None:
+            cached = self.resample(daily, timeframe)
+            self.timeframe_cache.set(key, cached)
+        return cached
+    
+    def analyze_multi_timeframe(self, ticker, df, daily_trend=None, timeframes=('1wk', '1mo')):
+        """Tendência em cada timeframe e se os timeframes maiores confirmam o diário"""
+        result = {}
+        for timeframe in timeframes:
+            data = self.get_timeframe_data(ticker, timeframe, df)
+            if data is None or len(data) < 50:
+                result[timeframe] = {'trend': 'N/A', 'score': 0}
+                continue
+            # Reaproveita a etapa técnica memoizada, com chave própria por timeframe
+            result[timeframe] = self.analyze(ticker, data, timeframe=timeframe)['trend']
+        
+        if daily_trend is not None:
+            higher = [r['trend'] for r in result.values() if r['trend'] != 'N/A']
+            if higher and all(t == daily_trend['trend'] for t in higher):
+                result['confirmation'] = 'CONFIRMADA'
+            elif higher and daily_trend['trend'] not in higher:
+                result['confirmation'] = 'DIVERGENTE'
+            else:
+                result['confirmation'] = 'PARCIAL'
+        return result
+    
+    def publish_frame(self, ticker, df, indicators):
+        """Disponibiliza preços e indicadores já calculados para outras telas"""
+        self.frames.set(ticker, (df, indicators))
+    
+    def get_chart_data(self, ticker, period='6mo'):
+        """Preços e indicadores do ticker, reaproveitando o que a análise já calculou"""
+        cached = self.frames.get(ticker)
+        if cached is not None:
+            return cached
+        
+        df = self.get_price_data(ticker, period=period)
+        if df is None or len(df) < 50:
+            return None
+        indicators = self.calculate_indicators(df)
+        self.publish_frame(ticker, df, indicators)
+        return df, indicators
+    
+    def analyze(self, ticker, df, indicators=None, timeframe='1d'):
+        """
+        Etapa técnica completa (indicadores, tendência, momentum, MACD,
+        volatilidade, suporte/resistência e score), memoizada enquanto os
+        candles do ticker não mudarem
+        """
+        key = self._analysis_key(ticker, df, timeframe)
+        cached = self.analysis_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        if indicators is None:
+            indicators = self.calculate_indicators(df)
+        trend = self.analyze_trend(df, indicators)
+        patterns = self.analyze_patterns(indicators)
+        momentum = self.analyze_momentum(indicators)
+        macd = self.analyze_macd(indicators)
+        result = {
+            'indicators': indicators,
+            'trend': trend,
+            'patterns': patterns,
+            'momentum': momentum,
+            'macd': macd,
+            'volatility': self.analyze_volatility(df, indicators),
+            # Só os níveis diários entram no índice do universo
+            'support_resistance': self.calculate_support_resistance(
+                df, indicators=indicators, ticker=ticker if timeframe == '1d' else None
+            ),
+            'score': self.generate_technical_score(trend, momentum, macd, patterns),
+        }
+        self.analysis_cache.set(key, result)
+        return result
+    
+    def uncached_frames(self, frames):
+        """Filtra os tickers cuja etapa técnica ainda não está em cache"""
+        return {
+            ticker: df for ticker, df in frames.items()
+            if df is not None and self.analysis_cache.get(self._analysis_key(ticker, df)) is None
+        }
+    
+    def _analysis_key(self, ticker, df, timeframe='1d'):
+        # O último candle entra por valor: no pregão ele muda sem mudar de data
+        last_bar = tuple(float(v) for v in df.iloc[-1][['Open', 'High', 'Low', 'Close', 'Volume']])
+        thresholds = (self.rsi_oversold, self.rsi_overbought)
+        return (ticker, timeframe, df.index[0], df.index[-1], len(df), last_bar,
+                self.matrix_engine.params, self.pattern_engine.params, thresholds)
+    
     def calculate_indicators(self, df):
         if df is None or len(df) < 50:
             return None
         try:
-            indicators = {
-                'SMA_20': SMAIndicator(df['Close'], window=20).sma_indicator(),
-                'RSI': RSIIndicator(df['Close'], window=14).rsi(),
-                'MACD': MACD(df['Close']).macd(),
-            }
+            indicators = self.matrix_engine.calculate(df)
+            indicators.update(self._pattern_masks(df))
             return indicators
-        except:
+        except Exception:
+            logger.warning("Falha ao calcular indicadores", exc_info=True)
             return None
     
+    def calculate_indicators_batch(self, frames):
+        """Indicadores de vários tickers em uma única passada vetorizada"""
+        frames = {t: df for t, df in frames.items() if df is not None and len(df) >= 50}
+        if not frames:
+            return {}
+        try:
+            # Indicadores e padrões de candle sobre a mesma matriz de preços
+            matrices = build_price_matrix(frames)
+            indicators = self.matrix_engine.calculate(matrices)
+            indicators.update(self._pattern_masks(matrices))
+            return {
+                ticker: self.matrix_engine.split(indicators, ticker, df.index)
+                for ticker, df in frames.items()
+            }
+        except Exception:
+            logger.warning("Falha no cálculo vetorizado de indicadores", exc_info=True)
+            return {}
+    
+    def _pattern_masks(self, data):
+        return {
+            f'PATTERN_{name}': mask
+            for name, mask in self.pattern_engine.detect(data).items()
+        }
+    
     def analyze_trend(self, df, indicators):
         if indicators is None:
             return {'trend': 'NEUTRO', 'score': 0}
@@ -31,49 +381,222 @@ class TechnicalAnalysisEngine:
         try:
             current_price = df['Close'].iloc[-1]
             sma_20 = indicators['SMA_20'].iloc[-1]
+            sma_50 = indicators['SMA_50'].iloc[-1]
+            sma_200 = indicators['SMA_200'].iloc[-1]
+            
+            # Alinhamento preço > SMA20 > SMA50 > SMA200 (SMA200 exige ~1 ano de dados)
             score = 1 if current_price > sma_20 else -1
-            trend = 'ALTA' if score > 0 else 'BAIXA'
-            return {'trend': trend, 'score': score}
-        except:
+            if pd.notna(sma_50):
+                score += 1 if sma_20 > sma_50 else -1
+            if pd.notna(sma_50) and pd.notna(sma_200):
+                score += 1 if sma_50 > sma_200 else -1
+            
+            if score > 0:
+                trend = 'ALTA'
+            elif score < 0:
+                trend = 'BAIXA'
+            else:
+                trend = 'NEUTRO'
+            
+            adx = indicators['ADX'].iloc[-1]
+            strength = 'FORTE' if pd.notna(adx) and adx >= 25 else 'FRACA'
+            return {'trend': trend, 'score': score, 'adx': adx, 'strength': strength}
+        except Exception:
+            logger.debug("Tendência indisponível", exc_info=True)
             return {'trend': 'NEUTRO', 'score': 0}
     
+    def analyze_patterns(self, indicators):
+        """Padrões de candlestick do último candle e seu viés (-1 a 1)"""
+        if indicators is None:
+            return {'patterns': [], 'signal': 'NEUTRO', 'score': 0}
+        
+        try:
+            detected = [
+                name for name in PATTERN_BIAS
+                if f'PATTERN_{name}' in indicators and bool(indicators[f'PATTERN_{name}'].iloc[-1])
+            ]
+            score = int(np.clip(sum(PATTERN_BIAS[name] for name in detected), -1, 1))
+            
+            if score > 0:
+                signal = 'ALTA'
+            elif score < 0:
+                signal = 'BAIXA'
+            else:
+                signal = 'NEUTRO'
+            
+            return {
+                'patterns': detected,
+                'labels': [PATTERN_LABELS[name] for name in detected],
+                'signal': signal,
+                'score': score
+            }
+        except Exception:
+            logger.debug("Padrões de candle indisponíveis", exc_info=True)
+            return {'patterns': [], 'signal': 'NEUTRO', 'score': 0}
+    
     def analyze_momentum(self, indicators):
         if indicators is None:
             return {'status': 'NEUTRO', 'score': 0, 'rsi': 50}
         try:
             rsi = indicators['RSI'].iloc[-1]
-            if rsi < 30:
-                return {'status': 'SOBREVENDIDO', 'score': 3, 'rsi': rsi}
-            elif rsi > 70:
-                return {'status': 'SOBRECOMPRADO', 'score': -3, 'rsi': rsi}
+            stoch_k = indicators['STOCH_K'].iloc[-1]
+            if rsi < self.rsi_oversold:
+                return {'status': 'SOBREVENDIDO', 'score': 3, 'rsi': rsi, 'stoch_k': stoch_k}
+            elif rsi > self.rsi_overbought:
+                return {'status': 'SOBRECOMPRADO', 'score': -3, 'rsi': rsi, 'stoch_k': stoch_k}
             else:
-                return {'status': 'NEUTRO', 'score': 0, 'rsi': rsi}
-        except:
+                return {'status': 'NEUTRO', 'score': 0, 'rsi': rsi, 'stoch_k': stoch_k}
+        except Exception:
+            logger.debug("Momentum indisponível", exc_info=True)
             return {'status': 'NEUTRO', 'score': 0, 'rsi': 50}
     
     def analyze_macd(self, indicators):
-        return {'signal': 'NEUTRO', 'strength': 0}
+        if indicators is None:
+            return {'signal': 'NEUTRO', 'strength': 0}
+        try:
+            histogram = indicators['MACD_hist']
+            current, previous = histogram.iloc[-1], histogram.iloc[-2]
+            if pd.isna(current) or pd.isna(previous):
+                return {'signal': 'NEUTRO', 'strength': 0}
+            
+            if current > 0 and previous <= 0:
+                signal, strength = 'CRUZAMENTO DE ALTA', 2
+            elif current < 0 and previous >= 0:
+                signal, strength = 'CRUZAMENTO DE BAIXA', -2
+            elif current > 0:
+                signal, strength = 'ALTA', 1
+            elif current < 0:
+                signal, strength = 'BAIXA', -1
+            else:
+                signal, strength = 'NEUTRO', 0
+            
+            return {
+                'signal': signal,
+                'strength': strength,
+                'macd': indicators['MACD'].iloc[-1],
+                'signal_line': indicators['MACD_signal'].iloc[-1],
+                'histogram': current
+            }
+        except Exception:
+            logger.debug("MACD indisponível", exc_info=True)
+            return {'signal': 'NEUTRO', 'strength': 0}
     
-    def calculate_support_resistance(self, df, window=20):
+    def analyze_volatility(self, df, indicators):
+        if indicators is None:
+            return None
         try:
-            resistance = df['High'].rolling(window=window).max().iloc[-1]
-            support = df['Low'].rolling(window=window).min().iloc[-1]
             current = df['Close'].iloc[-1]
+            atr = indicators['ATR'].iloc[-1]
+            upper = indicators['BB_upper'].iloc[-1]
+            lower = indicators['BB_lower'].iloc[-1]
+            return {
+                'atr': atr,
+                'atr_pct': (atr / current) * 100,
+                'bb_upper': upper,
+                'bb_lower': lower,
+                'bb_position': ((current - lower) / (upper - lower)) * 100 if upper != lower else 50
+            }
+        except Exception:
+            logger.debug("Volatilidade indisponível", exc_info=True)
+            return None
+    
+    def calculate_support_resistance(self, df, window=20, indicators=None, ticker=None):
+        """
+        Extremos da janela recente mais os níveis por pivôs (com toques e
+        força); com `ticker`, os níveis ficam no índice de `support_resistance`
+        """
+        try:
+            if indicators is not None and window == self.matrix_engine.sr_window:
+                resistance = indicators['RESISTANCE'].iloc[-1]
+                support = indicators['SUPPORT'].iloc[-1]
+            else:
+                # Só o último valor interessa: basta a cauda da série
+                resistance = df['High'].iloc[-window:].max()
+                support = df['Low'].iloc[-window:].min()
+            current = df['Close'].iloc[-1]
+            
+            if ticker is not None:
+                levels = self.support_resistance.calculate(ticker, df)
+            else:
+                levels = self.support_resistance.calculate_for_frames({'df': df}, index=False)['df']
             return {
                 'resistance': resistance,
                 'support': support,
                 'current': current,
                 'dist_resistance_pct': ((resistance - current) / current) * 100,
-                'dist_support_pct': ((current - support) / current) * 100
+                'dist_support_pct': ((current - support) / current) * 100,
+                'levels': levels
             }
-        except:
+        except Exception:
+            logger.debug("Suporte/resistência indisponível", exc_info=True)
             return None
     
-    def generate_technical_score(self, trend, momentum, macd):
+    def update_levels(self, frames):
+        """Recalcula os níveis de todo o universo em uma passada sobre a matriz"""
+        try:
+            return self.support_resistance.calculate_for_frames(frames)
+        except Exception:
+            logger.warning("Falha ao recalcular níveis de suporte/resistência", exc_info=True)
+            return {}
+    
+    def score_series(self, df, indicators):
+        """
+        Versão vetorizada das regras de tendência, momentum, MACD, padrões e score
+        técnico, avaliada em todos os candles de uma vez (para backtests)
+        """
+        close = df['Close'].to_numpy(dtype=float)
+        sma_20 = indicators['SMA_20'].to_numpy(dtype=float)
+        sma_50 = indicators['SMA_50'].to_numpy(dtype=float)
+        sma_200 = indicators['SMA_200'].to_numpy(dtype=float)
+        
+        trend = np.where(close > sma_20, 1, -1)
+        trend += np.where(np.isnan(sma_50), 0, np.where(sma_20 > sma_50, 1, -1))
+        trend += np.where(np.isnan(sma_50) | np.isnan(sma_200), 0, np.where(sma_50 > sma_200, 1, -1))
+        
+        rsi = indicators['RSI'].to_numpy(dtype=float)
+        momentum = np.where(rsi < self.rsi_oversold, 3, np.where(rsi > self.rsi_overbought, -3, 0))
+        
+        current = indicators['MACD_hist'].to_numpy(dtype=float)
+        previous = np.concatenate([[np.nan], current[:-1]])
+        macd = np.select(
+            [
+                np.isnan(current) | np.isnan(previous),
+                (current > 0) & (previous <= 0),
+                (current < 0) & (previous >= 0),
+                current > 0,
+                current < 0,
+            ],
+            [0, 2, -2, 1, -1],
+            default=0
+        )
+        
+        masks = {
+            name: indicators[f'PATTERN_{name}'].to_numpy(dtype=bool)
+            for name in PATTERN_BIAS if f'PATTERN_{name}' in indicators
+        }
+        if len(masks) == len(PATTERN_BIAS):
+            pattern = self.pattern_engine.signal(masks)
+        else:
+            pattern = np.zeros(len(df), dtype=int)
+        
+        total = trend + momentum + macd + pattern
+        return pd.DataFrame({
+            'trend': trend,
+            'momentum': momentum,
+            'macd': macd,
+            'pattern': pattern,
+            'rsi': rsi,
+            'score': ((total + 9) / 18) * 100,
+        }, index=df.index)
+    
+    def generate_technical_score(self, trend, momentum, macd, patterns=None):
+        # Tendência (-3 a 3) + momentum (-3 a 3) + MACD (-2 a 2) + padrões (-1 a 1)
         trend_score = trend.get('score', 0)
         momentum_score = momentum.get('score', 0)
-        total_score = trend_score + momentum_score
-        normalized_score = ((total_score + 6) / 12) * 100
+        macd_score = macd.get('strength', 0)
+        pattern_score = patterns.get('score', 0) if patterns else 0
+        total_score = trend_score + momentum_score + macd_score + pattern_score
+        normalized_score = ((total_score + 9) / 18) * 100
         
         if normalized_score >= 70:
             classification = "🟢 COMPRA FORTE"
@@ -88,3 +611,24 @@ class TechnicalAnalysisEngine:
             'score': round(normalized_score, 1),
             'classification': classification
         }
+
+def _period_start(period):
+    """Converte um período no formato do yfinance ('6mo', '1y', ...) em data inicial"""
+    today = pd.Timestamp.now().normalize()
+    if period in (None, 'max'):
+        return None
+    if period == 'ytd':
+        return today.replace(month=1, day=1)
+    
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        return None
+    
+    amount, unit = int(match.group(1)), match.group(2)
+    offsets = {
+        'd': pd.DateOffset(days=amount),
+        'wk': pd.DateOffset(weeks=amount),
+        'mo': pd.DateOffset(months=amount),
+        'y': pd.DateOffset(years=amount),
+    }
+    return today - offsets[unit]
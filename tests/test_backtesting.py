@@ -0,0 +1,39 @@
+"""
+Testes do modelo de carteira do backtest
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.backtesting import max_drawdown, non_overlapping, portfolio_equity
+
+
+def test_signals_are_skipped_while_a_position_is_open():
+    # Ticker 0: entra em 0 (sai em 5), ignora 1 e 2, entra de novo em 5
+    bars = [0, 1, 2, 5, 6, 3]
+    held = [5, 5, 5, 1, 1, 2]
+    tickers = [0, 0, 0, 0, 0, 1]
+
+    assert non_overlapping(bars, held, tickers).tolist() == [True, False, False, True, True, True]
+
+
+def test_portfolio_splits_capital_across_tickers():
+    trades = pd.DataFrame({
+        'exit_date': pd.to_datetime(['2025-01-03', '2025-01-06', '2025-01-06', '2025-01-10']),
+        'ticker': ['A', 'A', 'B', 'A'],
+        'return': [0.10, -0.50, 0.20, 0.10],
+    })
+
+    equity = portfolio_equity(trades)
+
+    # Metade do capital em cada ticker, cada metade com os retornos compostos do seu ticker
+    assert equity.tolist() == pytest.approx([1.05, 0.875, 0.9025])
+    # Com quatro partes, as duas sem operação ficam em caixa
+    assert portfolio_equity(trades, slots=4).iloc[-1] == pytest.approx(0.95125)
+
+
+def test_drawdown_is_measured_from_the_previous_peak():
+    assert max_drawdown([1.05, 0.875, 0.9025]) == pytest.approx(1 - 0.875 / 1.05)
+    assert max_drawdown([0.8, 1.2]) == pytest.approx(0.2)
+    assert max_drawdown(np.array([])) == 0.0
@@ -0,0 +1,143 @@
+"""
+Testes do provedor Brapi contra um servidor HTTP local que imita `/quote`
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from modules.brapi_provider import BrapiProvider, _range_for_start
+from modules.data_providers import QuotaExceeded
+from modules.http_client import HTTPClient
+from modules.rate_limiter import DailyQuota
+
+# Pregões de 2 e 3 de janeiro de 2025 (18h em Brasília)
+BARS = [
+    {'date': 1735851600, 'open': 10.0, 'high': 11.0, 'low': 9.0, 'close': 10.0,
+     'volume': 1000, 'adjustedClose': 9.0},
+    {'date': 1735938000, 'open': 20.0, 'high': 22.0, 'low': 18.0, 'close': 20.0,
+     'volume': 2000, 'adjustedClose': 20.0},
+]
+
+
+class FakeBrapi(BaseHTTPRequestHandler):
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        symbols = url.path.rsplit('/quote/', 1)[1].split(',')
+        self.requests.append((symbols, params))
+
+        results = []
+        for symbol in symbols:
+            result = {
+                'symbol': symbol,
+                'priceEarnings': 8.5,
+                'defaultKeyStatistics': {'priceToBook': {'raw': 1.2}},
+                'financialData': {'returnOnEquity': 0.2, 'profitMargins': 0.1},
+            }
+            if 'range' in params:
+                result['historicalDataPrice'] = BARS
+            results.append(result)
+
+        body = json.dumps({'results': results}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    FakeBrapi.requests = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakeBrapi)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}/api'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_provider(base_url, **kwargs):
+    return BrapiProvider('token', base_url=base_url, session=HTTPClient(cache_path=None), **kwargs)
+
+
+def test_fetch_splits_tickers_into_chunks(server):
+    tickers = ['PETR4.SA', 'VALE3.SA', 'SLCE3.SA', 'AGRO3.SA', 'SMTO3.SA']
+    results = make_provider(server, chunk_size=2).fetch(tickers)
+
+    assert [symbols for symbols, _ in FakeBrapi.requests] == [
+        ['PETR4', 'VALE3'], ['SLCE3', 'AGRO3'], ['SMTO3'],
+    ]
+    assert all(params['token'] == ['token'] for _, params in FakeBrapi.requests)
+    assert sorted(results) == sorted(tickers)
+
+
+def test_symbols_are_mapped_back_to_yahoo_tickers(server):
+    provider = make_provider(server)
+    results = provider.fetch(['SLCE3.SA', 'DE', 'ZS=F'])
+
+    # Só tickers da B3 vão para a Brapi, sem o sufixo `.SA`
+    assert FakeBrapi.requests[0][0] == ['SLCE3']
+    assert list(results) == ['SLCE3.SA']
+    assert results['SLCE3.SA']['symbol'] == 'SLCE3'
+
+
+def test_history_is_adjusted_and_indexed_by_session_date(server):
+    frames = make_provider(server).history(['SLCE3.SA'], period='1mo')
+
+    _, params = FakeBrapi.requests[0]
+    assert params['range'] == ['1mo'] and params['interval'] == ['1d']
+    df = frames['SLCE3.SA']
+    assert list(df.index) == [pd.Timestamp('2025-01-02'), pd.Timestamp('2025-01-03')]
+    # OHLC escalados por adjustedClose / close; volume preservado
+    assert df.iloc[0][['Open', 'High', 'Low', 'Close']].tolist() == pytest.approx([9.0, 9.9, 8.1, 9.0])
+    assert df.iloc[1]['Close'] == pytest.approx(20.0)
+    assert df['Volume'].tolist() == [1000, 2000]
+
+
+def test_history_from_start_keeps_only_later_bars(server):
+    frames = make_provider(server).history(['SLCE3.SA'], start='2025-01-03')
+
+    # Menor intervalo da Brapi que cobre o período desde `start`
+    assert FakeBrapi.requests[0][1]['range'] == [_range_for_start('2025-01-03')]
+    assert list(frames['SLCE3.SA'].index) == [pd.Timestamp('2025-01-03')]
+
+
+def test_fundamentals_read_the_requested_modules(server):
+    data = make_provider(server).fundamentals(['SLCE3.SA'], fields={'pe_ratio', 'price_to_book'})
+
+    _, params = FakeBrapi.requests[0]
+    assert params['fundamental'] == ['true']
+    assert params['modules'] == ['defaultKeyStatistics']
+    assert data == {'SLCE3.SA': {'pe_ratio': 8.5, 'price_to_book': 1.2}}
+
+
+def test_quota_exceeded_without_any_result(server, tmp_path):
+    quota = DailyQuota(str(tmp_path / 'quota.db'), limits={'brapi': 0})
+    provider = make_provider(server, quota=quota)
+
+    assert provider.remaining_quota() == 0
+    with pytest.raises(QuotaExceeded):
+        provider.fetch(['SLCE3.SA'])
+    assert FakeBrapi.requests == []
+
+
+def test_quota_exhausted_midway_returns_partial_results(server, tmp_path):
+    quota = DailyQuota(str(tmp_path / 'quota.db'), limits={'brapi': 1})
+    provider = make_provider(server, quota=quota, chunk_size=1)
+
+    results = provider.fetch(['SLCE3.SA', 'AGRO3.SA'])
+
+    assert list(results) == ['SLCE3.SA']
+    assert len(FakeBrapi.requests) == 1
+    assert quota.used('brapi') == 1
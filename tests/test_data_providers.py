@@ -0,0 +1,89 @@
+"""
+Testes do roteamento de provedores: falta de dados x falhas do provedor
+"""
+
+import logging
+
+import pandas as pd
+import pytest
+
+from modules import data_providers
+from modules.data_providers import ProviderRouter, QuotaExceeded, YahooProvider
+
+INDEX = pd.date_range('2025-01-02', periods=3, freq='B')
+
+
+def fake_download(missing=(), error=None):
+    """`yf.download` que não traz `missing` e registra o erro como o yfinance faz"""
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append(list(tickers))
+        failed = [t for t in tickers if t in missing]
+        if failed:
+            logging.getLogger('yfinance').error(f'{failed}: {error}')
+        frames = {
+            t: pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 1.0}, index=INDEX)
+            for t in tickers if t not in missing
+        }
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    return download, calls
+
+
+@pytest.fixture
+def router():
+    return ProviderRouter([YahooProvider()], backoff=0.001, failure_threshold=2)
+
+
+def test_tickers_without_data_are_not_failures(router, monkeypatch):
+    download, calls = fake_download(
+        missing={'OLD3.SA', 'GONE3.SA'},
+        error="YFPricesMissingError('possibly delisted; no price data found')"
+    )
+    monkeypatch.setattr(data_providers.yf, 'download', download)
+
+    frames = router.call('history', ['SLCE3.SA', 'OLD3.SA', 'GONE3.SA'], period='1y')
+    for ticker in ['OLD3.SA', 'GONE3.SA']:
+        assert router.call('history', [ticker], period='1y') == {}
+
+    assert list(frames) == ['SLCE3.SA']
+    # Nenhuma nova tentativa e nenhuma falha contada no disjuntor
+    assert len(calls) == 3
+    metrics = router.metrics()['yahoo']
+    assert metrics['failures'] == 0 and metrics['circuit'] == 'closed'
+
+
+def test_throttling_is_retried_and_opens_the_circuit(router, monkeypatch):
+    download, calls = fake_download(
+        missing={'SLCE3.SA'}, error="YFRateLimitError('Too Many Requests. Rate limited.')"
+    )
+    monkeypatch.setattr(data_providers.yf, 'download', download)
+
+    for _ in range(2):
+        assert router.call('history', ['SLCE3.SA'], period='1y') == {}
+
+    assert len(calls) == 2 * (router.max_retries + 1)
+    assert router.metrics()['yahoo']['circuit'] == 'open'
+
+
+def test_quota_exceeded_releases_the_half_open_trial():
+    class QuotaProvider:
+        name = 'brapi'
+        cost = 1
+
+        def supports(self, ticker):
+            return True
+
+        def remaining_quota(self):
+            return 1
+
+        def history(self, tickers, **kwargs):
+            raise QuotaExceeded('cota')
+
+    router = ProviderRouter([QuotaProvider()], reset_timeout=0)
+    breaker = router.breakers['brapi']
+    breaker.opened_at = 0.0
+
+    assert router.call('history', ['SLCE3.SA']) == {}
+    assert breaker.state == 'half-open' and breaker.allow()
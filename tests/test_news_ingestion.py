@@ -0,0 +1,237 @@
+"""
+Testes da coleta de notícias contra servidores locais que imitam o
+Finnhub (`/company-news`) e a NewsAPI (`/everything`)
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import pytest
+
+from modules.data_providers import QuotaExceeded
+from modules.database import AgroDatabase
+from modules.http_client import HTTPClient
+from modules.news_analysis import NewsAnalysisEngine
+from modules.news_sources import (
+    FinnhubNewsSource, NewsAPISource, NewsBudgetScheduler, content_hash,
+)
+from modules.news_store import NewsStore
+from modules.rate_limiter import DailyQuota
+
+PUBLISHED = datetime(2026, 10, 16, 13, 30, tzinfo=timezone.utc)
+SHARED_TITLE = 'Fertilizer prices surge as Nutrien and Mosaic cut output'
+
+
+class FakeNewsProviders(BaseHTTPRequestHandler):
+    requests = []
+    newsapi_status = {'status': 'ok'}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+        self.requests.append((url.path, params, dict(self.headers)))
+
+        if url.path.endswith('/company-news'):
+            self._send([
+                {'headline': f"{params['symbol']} beats earnings estimates", 'summary': ' Strong quarter ',
+                 'url': 'https://example.com/1', 'source': 'Reuters',
+                 'datetime': int(PUBLISHED.timestamp())},
+                {'headline': SHARED_TITLE, 'summary': 'Potash output cut',
+                 'url': 'https://example.com/2', 'source': 'AP',
+                 'datetime': int(PUBLISHED.timestamp())},
+                {'headline': '', 'datetime': int(PUBLISHED.timestamp())},
+            ])
+        elif url.path.endswith('/everything'):
+            articles = []
+            if 'Mosaic' in params['q']:
+                # A mesma matéria, com outra caixa e pontuação, em outro veículo
+                articles = [{
+                    'title': f'{SHARED_TITLE.upper()}!', 'description': 'Nutrien e Mosaic reduzem produção',
+                    'url': 'https://example.org/a', 'source': {'name': 'Valor'},
+                    'publishedAt': '2026-10-16T13:45:00Z',
+                }]
+            self._send({**self.newsapi_status, 'articles': articles})
+        else:
+            self._send({}, status=404)
+
+
+@pytest.fixture
+def server():
+    FakeNewsProviders.requests = []
+    FakeNewsProviders.newsapi_status = {'status': 'ok'}
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakeNewsProviders)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def requests_to(path):
+    return [params for request_path, params, _ in FakeNewsProviders.requests if request_path.endswith(path)]
+
+
+def make_engine(base_url, tmp_path, limits):
+    http = HTTPClient(cache_path=None)
+    quota = DailyQuota(str(tmp_path / 'quota.db'), limits=limits)
+    engine = NewsAnalysisEngine(
+        'finnhub-key', 'newsapi-key', http=http, store=NewsStore(str(tmp_path / 'news.db')),
+        quota=quota, database=AgroDatabase()
+    )
+    engine.sources = [
+        FinnhubNewsSource('finnhub-key', http, base_url=f'{base_url}/api/v1'),
+        NewsAPISource('newsapi-key', http, base_url=f'{base_url}/v2'),
+    ]
+    return engine, quota
+
+
+def test_finnhub_articles_are_normalized(server):
+    source = FinnhubNewsSource('finnhub-key', HTTPClient(cache_path=None), base_url=f'{server}/api/v1')
+    articles = source.fetch(['MOS'], ['Mosaic'], PUBLISHED - timedelta(days=7))
+
+    path, params, headers = FakeNewsProviders.requests[0]
+    assert path == '/api/v1/company-news'
+    assert params['symbol'] == 'MOS' and params['from'] == '2026-10-09'
+    assert headers['X-Finnhub-Token'] == 'finnhub-key'
+    # Notícias sem título são descartadas
+    assert len(articles) == 2
+    assert articles[0] == {
+        'id': content_hash('MOS beats earnings estimates'),
+        'title': 'MOS beats earnings estimates',
+        'summary': 'Strong quarter',
+        'url': 'https://example.com/1',
+        'source': 'Reuters',
+        'provider': 'finnhub',
+        'published_at': '2026-10-16T13:30:00Z',
+        'tickers': [],
+    }
+
+
+def test_newsapi_articles_are_normalized(server):
+    source = NewsAPISource('newsapi-key', HTTPClient(cache_path=None), base_url=f'{server}/v2')
+    since = datetime(2026, 10, 9, 15, 42, 7, tzinfo=timezone.utc)
+    articles = source.fetch(['MOS', 'NTR'], ['Mosaic', 'Nutrien'], since)
+
+    params = requests_to('/everything')[0]
+    assert params['q'] == '"Mosaic" OR "Nutrien"'
+    # Só a data, para que a URL se repita entre coletas e o GET condicional funcione
+    assert params['from'] == '2026-10-09'
+    assert articles[0]['title'] == f'{SHARED_TITLE.upper()}!'
+    assert articles[0]['summary'] == 'Nutrien e Mosaic reduzem produção'
+    assert articles[0]['source'] == 'Valor'
+    assert articles[0]['provider'] == 'newsapi'
+    assert articles[0]['published_at'] == '2026-10-16T13:45:00Z'
+
+
+def test_newsapi_rate_limit_raises_quota_exceeded(server):
+    FakeNewsProviders.newsapi_status = {'status': 'error', 'code': 'rateLimited', 'message': 'limit'}
+    source = NewsAPISource('newsapi-key', HTTPClient(cache_path=None), base_url=f'{server}/v2')
+
+    with pytest.raises(QuotaExceeded):
+        source.fetch(['MOS'], ['Mosaic'], PUBLISHED)
+
+
+def test_same_story_from_both_providers_is_stored_once(server, tmp_path):
+    engine, _ = make_engine(server, tmp_path, limits={'newsapi': 100})
+
+    added = engine.refresh(['MOS'])
+
+    assert requests_to('/company-news') and requests_to('/everything')
+    # Finnhub: 2 notícias; NewsAPI: a mesma matéria compartilhada (mesmo hash)
+    assert added == 2
+    assert engine.store.count() == 2
+    shared = [a for a in engine.store.get('MOS') if a['id'] == content_hash(SHARED_TITLE)]
+    assert len(shared) == 1
+    # A matéria cita as duas empresas e fica associada a ambas
+    assert [a['id'] for a in engine.store.get('NTR')] == [content_hash(SHARED_TITLE)]
+
+
+def test_refresh_skips_queries_fetched_within_the_interval(server, tmp_path):
+    engine, _ = make_engine(server, tmp_path, limits={'newsapi': 100})
+
+    engine.refresh(['MOS'])
+    first = len(FakeNewsProviders.requests)
+    engine.refresh(['MOS'])
+
+    assert len(FakeNewsProviders.requests) == first
+
+
+def test_budget_allowance_follows_the_time_of_day(tmp_path):
+    quota = DailyQuota(str(tmp_path / 'quota.db'), limits={'newsapi': 100})
+    budget = NewsBudgetScheduler(quota, burst=10)
+    midnight = datetime(2026, 10, 16, tzinfo=timezone.utc)
+
+    assert budget.allowance(midnight) == 10
+    assert budget.allowance(midnight + timedelta(hours=12)) == 60
+    assert budget.allowance(midnight + timedelta(hours=23, minutes=59)) == 100
+
+    quota.try_consume('newsapi', 55)
+    assert budget.allowance(midnight + timedelta(hours=12)) == 5
+    assert budget.allowance(midnight) == 0
+
+
+def test_budget_selects_least_recently_fetched_first(tmp_path):
+    quota = DailyQuota(str(tmp_path / 'quota.db'), limits={'newsapi': 3})
+    budget = NewsBudgetScheduler(quota, burst=10)
+    last_fetched = {'a': 300.0, 'b': 100.0, 'd': 200.0}
+
+    selected = budget.select(['a', 'b', 'c', 'd', 'e'], last_fetched)
+
+    # Nunca consultadas primeiro, depois as mais antigas; a cota é reservada
+    assert selected == ['c', 'e', 'b']
+    assert quota.remaining('newsapi') == 0
+    assert budget.select(['a', 'd'], last_fetched) == []
+
+
+def test_newsapi_queries_stop_when_the_budget_is_spent(server, tmp_path):
+    engine, quota = make_engine(server, tmp_path, limits={'newsapi': 1})
+
+    engine.refresh(['MOS', 'BEEF3.SA', 'SLCE3.SA'])
+
+    assert len(requests_to('/everything')) == 1
+    assert quota.remaining('newsapi') == 0
+    # As consultas que ficaram de fora não foram marcadas e seguem pendentes
+    engine.refresh(['MOS', 'BEEF3.SA', 'SLCE3.SA'])
+    assert len(requests_to('/everything')) == 1
+
+
+def test_failed_queries_are_not_repeated_within_the_round(server, tmp_path):
+    FakeNewsProviders.newsapi_status = {'status': 'error', 'code': 'unexpectedError', 'message': 'boom'}
+    engine, quota = make_engine(server, tmp_path, limits={'newsapi': 100})
+    universe = engine.universe
+
+    engine.refresh(universe)
+    attempted = len(requests_to('/everything'))
+    for ticker in universe:
+        engine.get_news(ticker)
+
+    # Cada grupo é tentado uma vez; a falha fica registrada com backoff
+    assert attempted == len(engine._query_groups(engine.sources[1], universe))
+    assert len(requests_to('/everything')) == attempted
+    assert quota.used('newsapi') == attempted
+
+
+def test_quota_exceeded_suspends_the_provider(server, tmp_path):
+    FakeNewsProviders.newsapi_status = {'status': 'error', 'code': 'rateLimited', 'message': 'limit'}
+    engine, _ = make_engine(server, tmp_path, limits={'newsapi': 100})
+    engine.max_workers = 1
+
+    engine.refresh(engine.universe)
+    for ticker in engine.universe:
+        engine.get_news(ticker)
+
+    assert len(requests_to('/everything')) == 1